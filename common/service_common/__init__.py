@@ -0,0 +1,6 @@
+"""Code shared by the gateway, user, product and order services.
+
+The package is installed into every service image at build time (see the
+service Dockerfiles); locally, ``pip install -e common`` once per
+environment.
+"""
@@ -0,0 +1,86 @@
+from starlette.datastructures import MutableHeaders
+from starlette.responses import PlainTextResponse
+
+from .metrics import RequestTimings, current_timings, record_request, registry
+from .tracing import start_span
+
+
+class MetricsMiddleware:
+    """Records request histograms and adds a ``Server-Timing`` header.
+
+    Written as plain ASGI middleware so streamed responses pass through
+    untouched. The header is computed when the response starts, so work
+    done while streaming the body only shows up in the histograms.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", timings.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_timings.reset(token)
+            # FastAPI stores the matched route in the scope; use its template, not the raw path.
+            route = scope.get("route")
+            record_request(scope["method"], getattr(route, "path", "unmatched"), status, timings)
+
+
+class TracingMiddleware:
+    """Opens a server span per request, continuing an incoming ``traceparent``.
+
+    The trace id is returned in a ``traceresponse`` header so a client can
+    look up the trace of a slow call.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+
+        method = scope["method"]
+        attributes = {"http.method": method, "http.target": scope["path"]}
+        with start_span(f"{method} {scope['path']}", "server", attributes, traceparent) as span:
+
+            async def send_with_trace(message):
+                if message["type"] == "http.response.start":
+                    span.attributes["http.status_code"] = message["status"]
+                    if message["status"] >= 500:
+                        span.status = "error"
+                    MutableHeaders(scope=message).append("traceresponse", span.traceparent)
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_trace)
+            finally:
+                route = scope.get("route")
+                if route is not None:
+                    span.name = f"{method} {route.path}"
+
+
+def metrics_response() -> PlainTextResponse:
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,95 @@
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+
+
+SECRET_KEY = os.getenv('SECRET_KEY')
+ALGORITHM = os.getenv('ALGORITHM')
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', '4096'))
+INTERNAL_AUTH_SECRET = os.getenv('INTERNAL_AUTH_SECRET')
+# Shared by order and product only. The gateway sends INTERNAL_AUTH_SECRET on
+# every proxied request, so it must never hold this one.
+SERVICE_AUTH_SECRET = os.getenv('SERVICE_AUTH_SECRET')
+
+
+class TokenCache:
+    """Bounded LRU of already-verified token payloads, keyed by token hash.
+
+    Entries are dropped once their ``exp`` claim has passed, so a cached
+    token never outlives its signature.
+    """
+
+    def __init__(self, maxsize: int = TOKEN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            payload, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def put(self, key: str, payload: dict):
+        if self.maxsize <= 0:
+            return
+        expires_at = payload.get("exp")
+        with self._lock:
+            self._entries[key] = (payload, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
+
+
+def verify_token(token: str) -> dict:
+    """Check signature and expiry in-process; raises ``jwt.InvalidTokenError``."""
+    key = hashlib.sha256(token.encode('utf-8')).hexdigest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        return payload
+
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    token_cache.put(key, payload)
+    return payload
+
+
+def is_service_request(headers) -> bool:
+    """True when another service, not the gateway, presents SERVICE_AUTH_SECRET."""
+    secret = headers.get("X-Service-Auth")
+    return bool(SERVICE_AUTH_SECRET and secret and hmac.compare_digest(secret, SERVICE_AUTH_SECRET))
+
+
+def trusted_identity(headers) -> dict:
+    """Identity the gateway already verified, or None.
+
+    The X-User-* headers are only honoured when the request also carries
+    the shared INTERNAL_AUTH_SECRET, so clients cannot forge them.
+    """
+    if not INTERNAL_AUTH_SECRET:
+        return None
+    secret = headers.get("X-Internal-Auth")
+    user_id = headers.get("X-User-Id")
+    if not secret or not user_id or not hmac.compare_digest(secret, INTERNAL_AUTH_SECRET):
+        return None
+    try:
+        return {"user_id": int(user_id), "email": headers.get("X-User-Email")}
+    except ValueError:
+        return None
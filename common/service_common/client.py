@@ -0,0 +1,204 @@
+import asyncio
+import os
+import time
+
+import httpx
+from service_common.metrics import record_downstream
+from service_common.tracing import start_span
+
+
+SERVICE_TIMEOUT = float(os.getenv('SERVICE_TIMEOUT', '5'))
+SERVICE_RETRIES = int(os.getenv('SERVICE_RETRIES', '2'))
+SERVICE_MAX_CONNECTIONS = int(os.getenv('SERVICE_MAX_CONNECTIONS', '100'))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv('CIRCUIT_RESET_TIMEOUT', '10'))
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUS_CODES = {502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures and lets one probe through after the reset timeout."""
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, reset_timeout: float = CIRCUIT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class ServiceClient:
+    """Long-lived keep-alive pool for one downstream service, shared by the whole process."""
+
+    def __init__(self, name: str, base_url: str, timeout: float = SERVICE_TIMEOUT, retries: int = SERVICE_RETRIES):
+        self.name = name
+        self.base_url = (base_url or "").rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        # httpx transport for the pool; None opens real connections. Tests swap in a MockTransport.
+        self.transport = None
+        self.breaker = CircuitBreaker()
+        self._client = None
+        self._loop = None
+
+    async def start(self):
+        # Django's runserver drives each async view through its own event loop,
+        # while uvicorn keeps one loop per process; pooled connections are bound
+        # to the loop they were opened on, so rebuild the pool if the loop changes.
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._loop is not loop:
+            await self.close()
+        if self._client is None:
+            self._loop = loop
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                transport=self.transport,
+                limits=httpx.Limits(
+                    max_connections=SERVICE_MAX_CONNECTIONS,
+                    max_keepalive_connections=SERVICE_MAX_CONNECTIONS,
+                ),
+            )
+
+    async def close(self):
+        client, owner = self._client, self._loop
+        self._client = None
+        if client is None:
+            return
+        if owner is asyncio.get_running_loop():
+            await client.aclose()
+        elif not owner.is_closed():
+            # Connections can only be shut down on the loop that opened them.
+            asyncio.run_coroutine_threadsafe(client.aclose(), owner)
+        # A closed loop can't run the shutdown; the sockets are freed once the client is collected.
+
+    async def warm(self, path: str = "/healthz") -> bool:
+        """Open a keep-alive connection before the first real request.
+
+        ``path`` is requested on the service's origin. Failures are ignored
+        and do not count against the breaker.
+        """
+        await self.start()
+        try:
+            response = await self._client.get(httpx.URL(self.base_url).copy_with(path=path))
+        except (httpx.HTTPError, httpx.InvalidURL):
+            return False
+        return response.status_code < 500
+
+    def record_response(self, status_code: int):
+        # A 503 is the service shedding load on purpose, e.g. the user service's
+        # saturated hasher. It is up and answering, so it must not open the breaker.
+        if status_code >= 500 and status_code != 503:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def span_attributes(self, method: str, path: str, attempt: int = 0) -> dict:
+        return {"peer.service": self.name, "http.method": method, "http.url": f"{self.base_url}{path}", "attempt": attempt}
+
+    async def request(self, method: str, path: str, *, timeout: float = None, **kwargs) -> httpx.Response:
+        """Send a request with a per-call deadline.
+
+        Idempotent methods are retried on connection errors and 502/503/504.
+        Raises ``CircuitOpenError`` without touching the network while the
+        breaker is open, and ``httpx.HTTPError`` once retries are exhausted.
+        """
+        await self.start()
+        method = method.upper()
+        attempts = 1 + (self.retries if method in IDEMPOTENT_METHODS else 0)
+        deadline = time.monotonic() + (timeout or self.timeout)
+        headers = dict(kwargs.pop("headers", None) or {})
+
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"{self.name} service is unavailable")
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise httpx.TimeoutException(f"{self.name} service deadline exceeded")
+
+            started = time.perf_counter()
+            try:
+                with start_span(f"{method} {self.name}", "client", self.span_attributes(method, path, attempt)) as span:
+                    headers["traceparent"] = span.traceparent
+                    response = await self._client.request(
+                        method, f"{self.base_url}{path}", timeout=remaining, headers=headers, **kwargs,
+                    )
+                    span.attributes["http.status_code"] = response.status_code
+                    if response.status_code >= 500:
+                        span.status = "error"
+            except httpx.TransportError:
+                record_downstream(self.name, method, "error", time.perf_counter() - started)
+                self.breaker.record_failure()
+                if attempt + 1 >= attempts:
+                    raise
+            else:
+                record_downstream(self.name, method, response.status_code, time.perf_counter() - started)
+                self.record_response(response.status_code)
+                if response.status_code not in RETRY_STATUS_CODES or attempt + 1 >= attempts:
+                    return response
+
+            await asyncio.sleep(min(0.05 * 2 ** attempt, max(deadline - time.monotonic(), 0)))
+
+    async def stream(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Send a request and return the response with its body still unread.
+
+        The caller must ``aclose()`` the response. Streamed calls are never
+        retried because the request body may be a one-shot stream.
+        """
+        await self.start()
+        method = method.upper()
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} service is unavailable")
+
+        started = time.perf_counter()
+        try:
+            # The span ends once the response headers arrive; the body is streamed afterwards.
+            with start_span(f"{method} {self.name}", "client", self.span_attributes(method, path)) as span:
+                headers = dict(kwargs.pop("headers", None) or {})
+                headers["traceparent"] = span.traceparent
+                request = self._client.build_request(method, f"{self.base_url}{path}", headers=headers, **kwargs)
+                response = await self._client.send(request, stream=True)
+                span.attributes["http.status_code"] = response.status_code
+                if response.status_code >= 500:
+                    span.status = "error"
+        except httpx.TransportError:
+            record_downstream(self.name, method, "error", time.perf_counter() - started)
+            self.breaker.record_failure()
+            raise
+
+        record_downstream(self.name, method, response.status_code, time.perf_counter() - started)
+        self.record_response(response.status_code)
+        return response
@@ -0,0 +1,60 @@
+import time
+
+from sqlalchemy import event
+
+from .metrics import db_query_errors, record_query, track_queries
+from .tracing import MAX_STATEMENT_LENGTH, current_span
+
+
+def instrument_engine(engine):
+    """Count and time every statement executed through ``engine``, failed ones included."""
+    track_queries()
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append((context, time.perf_counter()))
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_start"].pop()[1]
+        record_query(time.perf_counter() - started)
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(context):
+        starts = context.connection.info.get("query_start") if context.connection is not None else None
+        if starts and starts[-1][0] is context.execution_context:
+            record_query(time.perf_counter() - starts.pop()[1], context.original_exception)
+        else:
+            # Raised before the cursor ran, e.g. while connecting: an error, but no statement.
+            db_query_errors.inc(type(context.original_exception).__name__)
+
+
+def trace_engine(engine):
+    """Record one span per SQL statement under the request that ran it."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        parent = current_span.get()
+        span = None
+        if parent is not None and parent.sampled:
+            span = parent.child("SQL", "client", {
+                "db.system": engine.dialect.name,
+                "db.statement": statement[:MAX_STATEMENT_LENGTH],
+            })
+        conn.info.setdefault("trace_spans", []).append((context, span))
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        span = conn.info["trace_spans"].pop()[1]
+        if span is not None:
+            span.end()
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(context):
+        spans = context.connection.info.get("trace_spans") if context.connection is not None else None
+        if spans and spans[-1][0] is context.execution_context:
+            span = spans.pop()[1]
+            if span is not None:
+                span.status = "error"
+                span.attributes["error"] = type(context.original_exception).__name__
+                span.end()
@@ -0,0 +1,230 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+EVENT_LOOP_LAG_INTERVAL = float(os.getenv('EVENT_LOOP_LAG_INTERVAL', '0.5'))
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram rendered in the Prometheus text format."""
+
+    def __init__(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        for label_values, counts, total, count in sorted(snapshot):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = format_labels(self.labels + ("le",), label_values + (format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+    def render(self) -> list:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {format_value(self.value)}",
+        ]
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._series = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._series[label_values] += amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = sorted(self._series.items())
+        for label_values, value in snapshot:
+            lines.append(f"{self.name}{format_labels(self.labels, label_values)} {format_value(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Time to handle a request, by route template.",
+    ("method", "route", "status"),
+))
+downstream_duration = registry.register(Histogram(
+    "downstream_request_duration_seconds",
+    "Duration of calls to downstream services, per attempt.",
+    ("target", "method", "status"),
+))
+event_loop_lag = registry.register(Histogram(
+    "event_loop_lag_seconds", "How late the event loop ran a timer scheduled every EVENT_LOOP_LAG_INTERVAL.",
+))
+event_loop_lag_last = registry.register(Gauge(
+    "event_loop_lag_last_seconds", "Most recent event loop lag sample.",
+))
+
+# Registered by track_queries(), so services without a database don't export them.
+request_db_queries = Histogram(
+    "http_request_db_queries", "SQL statements executed per request.", ("route",), QUERY_COUNT_BUCKETS,
+)
+request_db_duration = Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per request.", ("route",),
+)
+db_query_duration = Histogram(
+    "db_query_duration_seconds", "Duration of single SQL statements.",
+)
+db_query_errors = Counter(
+    "db_query_errors_total", "SQL statements that raised, by exception class.", ("error",),
+)
+_tracking_queries = False
+
+
+def track_queries():
+    """Export the SQL metrics; called by the database instrumentation of each service."""
+    global _tracking_queries
+    if not _tracking_queries:
+        _tracking_queries = True
+        for metric in (request_db_queries, request_db_duration, db_query_duration, db_query_errors):
+            registry.register(metric)
+
+
+class RequestTimings:
+    """Per-request accumulator for time spent outside the handler's own code."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.downstream = defaultdict(float)
+
+    def server_timing(self) -> str:
+        entries = [f"app;dur={(time.perf_counter() - self.started) * 1000:.2f}"]
+        if self.db_queries:
+            entries.append(f'db;dur={self.db_seconds * 1000:.2f};desc="{self.db_queries} queries"')
+        for target, seconds in self.downstream.items():
+            entries.append(f"{target};dur={seconds * 1000:.2f}")
+        return ", ".join(entries)
+
+
+# Holds a mutable RequestTimings, so updates made from other tasks, from
+# SQLAlchemy's greenlet or from a worker thread reach the request that
+# started them.
+current_timings = contextvars.ContextVar("current_timings", default=None)
+
+
+def record_query(seconds: float, error: BaseException = None):
+    """Account one SQL statement, successful or not, to the current request."""
+    db_query_duration.observe(seconds)
+    if error is not None:
+        db_query_errors.inc(type(error).__name__)
+    timings = current_timings.get()
+    if timings is not None:
+        timings.db_queries += 1
+        timings.db_seconds += seconds
+
+
+def record_downstream(target: str, method: str, status, seconds: float):
+    downstream_duration.observe(seconds, target, method, str(status))
+    timings = current_timings.get()
+    if timings is not None:
+        timings.downstream[target] += seconds
+
+
+def record_request(method: str, route: str, status, timings: RequestTimings):
+    request_duration.observe(time.perf_counter() - timings.started, method, route, str(status))
+    if _tracking_queries:
+        request_db_queries.observe(timings.db_queries, route)
+        request_db_duration.observe(timings.db_seconds, route)
+
+
+async def sample_event_loop_lag(interval: float = EVENT_LOOP_LAG_INTERVAL):
+    loop = asyncio.get_running_loop()
+    while True:
+        scheduled = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(loop.time() - scheduled - interval, 0.0)
+        event_loop_lag.observe(lag)
+        event_loop_lag_last.set(lag)
+
+
+@asynccontextmanager
+async def event_loop_monitor():
+    task = asyncio.create_task(sample_event_loop_lag())
+    try:
+        yield
+    finally:
+        task.cancel()
@@ -0,0 +1,173 @@
+import atexit
+import contextvars
+import json
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+
+
+SERVICE_NAME = os.getenv('SERVICE_NAME')
+TRACE_EXPORT_FILE = os.getenv('TRACE_EXPORT_FILE')
+TRACE_COLLECTOR_URL = os.getenv('TRACE_COLLECTOR_URL')
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '1'))
+EXPORT_BATCH_SIZE = 100
+EXPORT_QUEUE_SIZE = 10000
+MAX_STATEMENT_LENGTH = 500
+
+
+def set_default_service_name(name: str):
+    """Name written on this process's spans unless ``SERVICE_NAME`` is set."""
+    global SERVICE_NAME
+    SERVICE_NAME = os.getenv('SERVICE_NAME') or name
+
+
+def parse_traceparent(value: str):
+    """Return ``(trace_id, parent_span_id, sampled)`` from a W3C traceparent, or None."""
+    parts = (value or "").strip().lower().split("-")
+    if len(parts) < 4 or parts[0] == "ff":
+        return None
+    version, trace_id, parent_id, flags = parts[:4]
+    if len(version) != 2 or len(trace_id) != 32 or len(parent_id) != 16 or len(flags) != 2:
+        return None
+    try:
+        int(trace_id, 16), int(parent_id, 16)
+        sampled = bool(int(flags, 16) & 1)
+    except ValueError:
+        return None
+    if trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id, parent_id, sampled
+
+
+class SpanExporter:
+    """Ships finished spans from a background thread as JSON lines.
+
+    Spans go to ``TRACE_EXPORT_FILE`` (appended, one object per line)
+    and/or are POSTed in batches as a JSON array to ``TRACE_COLLECTOR_URL``.
+    When the queue is full new spans are dropped rather than slowing
+    requests down.
+    """
+
+    def __init__(self, path: str = None, url: str = None):
+        self.path = path
+        self.url = url
+        self.dropped = 0
+        self._queue = queue.Queue(EXPORT_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        threading.Thread(target=self._run, name="span-exporter", daemon=True).start()
+        atexit.register(self.flush)
+
+    def export(self, span: dict):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        while self._write_batch(block=False):
+            pass
+
+    def _run(self):
+        while True:
+            self._write_batch(block=True)
+
+    def _write_batch(self, block: bool) -> bool:
+        batch = []
+        try:
+            batch.append(self._queue.get(block=block))
+            while len(batch) < EXPORT_BATCH_SIZE:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        if not batch:
+            return False
+        with self._lock:
+            if self.path:
+                data = "".join(json.dumps(span) + "\n" for span in batch).encode()
+                # One O_APPEND write per batch keeps lines whole when several workers share the file.
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, data)
+                finally:
+                    os.close(fd)
+            if self.url:
+                request = urllib.request.Request(
+                    self.url, data=json.dumps(batch).encode(), headers={"Content-Type": "application/json"},
+                )
+                try:
+                    urllib.request.urlopen(request, timeout=2).close()
+                except OSError:
+                    self.dropped += len(batch)
+        return True
+
+
+exporter = SpanExporter(TRACE_EXPORT_FILE, TRACE_COLLECTOR_URL) if TRACE_EXPORT_FILE or TRACE_COLLECTOR_URL else None
+
+
+class Span:
+    def __init__(self, name: str, kind: str, trace_id: str, parent_id: str, sampled: bool, attributes: dict = None):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = attributes or {}
+        self.status = "ok"
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def child(self, name: str, kind: str = "internal", attributes: dict = None) -> "Span":
+        return Span(name, kind, self.trace_id, self.span_id, self.sampled, attributes)
+
+    def end(self):
+        if exporter is None or not self.sampled:
+            return
+        exporter.export({
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "service": SERVICE_NAME,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time": self.start_time,
+            "duration_ms": round((time.perf_counter() - self._started) * 1000, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        })
+
+
+current_span = contextvars.ContextVar("current_span", default=None)
+
+
+@contextmanager
+def start_span(name: str, kind: str = "internal", attributes: dict = None, traceparent: str = None):
+    """Run the block inside a new span, child of ``traceparent`` or of the current span."""
+    remote = parse_traceparent(traceparent) if traceparent else None
+    parent = current_span.get()
+    if remote:
+        span = Span(name, kind, *remote, attributes)
+    elif parent is not None:
+        span = parent.child(name, kind, attributes)
+    else:
+        sampled = exporter is not None and random.random() < TRACE_SAMPLE_RATE
+        span = Span(name, kind, os.urandom(16).hex(), None, sampled, attributes)
+
+    token = current_span.set(span)
+    try:
+        yield span
+    except BaseException as exc:
+        span.status = "error"
+        span.attributes["error"] = type(exc).__name__
+        raise
+    finally:
+        current_span.reset(token)
+        span.end()
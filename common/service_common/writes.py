@@ -0,0 +1,46 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+READ_YOUR_WRITES_SECONDS = float(os.getenv('READ_YOUR_WRITES_SECONDS', '5'))
+READ_YOUR_WRITES_MAX_USERS = int(os.getenv('READ_YOUR_WRITES_MAX_USERS', '100000'))
+
+
+class RecentWriters:
+    """Users who wrote within the last ``window`` seconds, in a bounded LRU.
+
+    Their reads go to the primary until the window has passed, so they see
+    their own writes however far the replicas lag behind. Order records
+    writes from ORM threads and checks them from the event loop, hence the
+    lock.
+    """
+
+    def __init__(self, window: float = READ_YOUR_WRITES_SECONDS, maxsize: int = READ_YOUR_WRITES_MAX_USERS):
+        self.window = window
+        self.maxsize = maxsize
+        self._deadlines = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, key):
+        if self.window <= 0 or key is None:
+            return
+        with self._lock:
+            self._deadlines[key] = time.monotonic() + self.window
+            self._deadlines.move_to_end(key)
+            if len(self._deadlines) > self.maxsize:
+                self._deadlines.popitem(last=False)
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            deadline = self._deadlines.get(key)
+            if deadline is None:
+                return False
+            if deadline > time.monotonic():
+                return True
+            del self._deadlines[key]
+            return False
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
@@ -0,0 +1,296 @@
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from service_common.metrics import Counter, Histogram, registry
+
+
+# Concurrent requests per route class; waiting requests queue behind them.
+# Override with e.g. ADMISSION_LIMITS="login=16,order_writes=32"; 0 disables a class.
+DEFAULT_ADMISSION_LIMITS = {
+    "login": 32,
+    "auth": 128,
+    "product_reads": 256,
+    "product_writes": 64,
+    "order_reads": 128,
+    "order_writes": 64,
+}
+ADMISSION_LIMITS = os.getenv('ADMISSION_LIMITS', '')
+ADMISSION_QUEUE_SIZE = int(os.getenv('ADMISSION_QUEUE_SIZE', '100'))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '1'))
+USER_RATE_LIMIT = float(os.getenv('USER_RATE_LIMIT', '50'))
+USER_RATE_BURST = int(os.getenv('USER_RATE_BURST', '100'))
+RATE_LIMIT_MAX_KEYS = int(os.getenv('RATE_LIMIT_MAX_KEYS', '100000'))
+RATE_LIMIT_REDIS_URL = os.getenv('RATE_LIMIT_REDIS_URL')
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+admission_wait = registry.register(Histogram(
+    "admission_queue_wait_seconds", "Time admitted requests waited for a concurrency slot.", ("route_class",),
+))
+admission_rejections = registry.register(Counter(
+    "admission_rejections_total", "Requests shed by admission control.", ("route_class", "reason"),
+))
+
+
+class Rejected(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def parse_limits(spec: str) -> dict:
+    limits = dict(DEFAULT_ADMISSION_LIMITS)
+    for item in spec.split(","):
+        if "=" in item:
+            name, value = item.split("=", 1)
+            limits[name.strip()] = int(value)
+    return limits
+
+
+def route_class(method: str, path: str):
+    """Admission bucket of a request, or None for requests that are never limited."""
+    if path == "/login":
+        return "login"
+    if path in ("/refresh", "/logout", "/validate-token"):
+        return "auth"
+    if path == "/products" or path.startswith("/products/"):
+        return "product_reads" if method in READ_METHODS else "product_writes"
+    if path == "/orders" or path.startswith("/orders/"):
+        return "order_reads" if method in READ_METHODS else "order_writes"
+    return None
+
+
+class ConcurrencyLimiter:
+    """At most ``limit`` requests in flight, with a bounded FIFO of waiters.
+
+    A request that finds the queue full, or is still queued after
+    ``timeout`` seconds, is rejected instead of piling more work onto a
+    saturated upstream.
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: int = ADMISSION_QUEUE_SIZE,
+                 timeout: float = ADMISSION_QUEUE_TIMEOUT):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._waiters = deque()
+
+    async def acquire(self):
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.queue_size:
+            self._reject("queue_full")
+
+        started = time.perf_counter()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.timeout)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            self._reject("queue_timeout")
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        self.admitted += 1
+        admission_wait.observe(time.perf_counter() - started, self.name)
+
+    def release(self):
+        # Hand the slot straight to the oldest waiter so newcomers can't overtake it.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def _abandon(self, waiter):
+        if waiter.done() and not waiter.cancelled():
+            # The slot was handed over just as we gave up; pass it on.
+            self.release()
+        else:
+            waiter.cancel()
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def _reject(self, reason: str):
+        self.rejected += 1
+        admission_rejections.inc(self.name, reason)
+        raise Rejected(reason, max(1, math.ceil(self.timeout)))
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+class TokenBucketLimiter:
+    """Per-key token buckets refilled at ``rate`` per second up to ``burst``.
+
+    Buckets live in a bounded LRU; an evicted key simply starts full again.
+    With ``redis_url`` the buckets are shared by all gateway replicas and
+    updated atomically in Redis; while Redis is unreachable the local
+    buckets are used instead.
+    """
+
+    REDIS_SCRIPT = """
+        local now = redis.call('TIME')
+        now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+        local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+        local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+        local tokens = tonumber(state[1]) or burst
+        local updated = tonumber(state[2]) or now
+        tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+        local allowed = 0
+        if tokens >= 1 then
+            tokens = tokens - 1
+            allowed = 1
+        end
+        redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+        redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+        return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, rate: float = USER_RATE_LIMIT, burst: int = USER_RATE_BURST,
+                 maxsize: int = RATE_LIMIT_MAX_KEYS, redis_url: str = RATE_LIMIT_REDIS_URL):
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        self.limited = 0
+        self.redis_errors = 0
+        self._buckets = OrderedDict()
+        self._redis = None
+        self._script = None
+        if redis_url and rate > 0:
+            import redis.asyncio
+
+            self._redis = redis.asyncio.from_url(redis_url, socket_timeout=0.1, socket_connect_timeout=0.1)
+            self._script = self._redis.register_script(self.REDIS_SCRIPT)
+            self._redis_errors = (redis.RedisError, OSError)
+
+    async def check(self, key: str, route: str):
+        """Take one token for ``key``; raises ``Rejected`` when the bucket is empty."""
+        if self.rate <= 0:
+            return
+        allowed, tokens = await self._take(key)
+        if not allowed:
+            self.limited += 1
+            admission_rejections.inc(route, "rate_limited")
+            raise Rejected("rate_limited", max(1, math.ceil((1 - tokens) / self.rate)))
+
+    async def _take(self, key: str):
+        if self._script is not None:
+            try:
+                allowed, tokens = await self._script(keys=[f"ratelimit:{key}"], args=[self.rate, self.burst])
+                return bool(allowed), float(tokens)
+            except self._redis_errors:
+                self.redis_errors += 1
+        return self._take_local(key)
+
+    def _take_local(self, key: str):
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(self.burst), now]
+            if len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return True, bucket[0]
+        return False, bucket[0]
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "keys": len(self._buckets),
+            "limited": self.limited,
+            "shared": self._script is not None,
+            "redis_errors": self.redis_errors,
+        }
+
+
+limiters = {
+    name: ConcurrencyLimiter(name, limit)
+    for name, limit in parse_limits(ADMISSION_LIMITS).items() if limit > 0
+}
+rate_limiter = TokenBucketLimiter()
+
+
+async def enforce_rate_limit(key: str, route: str):
+    """Per-caller token bucket for handlers; raises a 429 with ``Retry-After``."""
+    try:
+        await rate_limiter.check(key, route)
+    except Rejected as exc:
+        raise HTTPException(status_code=429, detail="Too many requests",
+                            headers={"Retry-After": str(exc.retry_after)})
+
+
+def admission_stats() -> dict:
+    return {
+        "routes": {name: limiter.stats() for name, limiter in limiters.items()},
+        "rate_limit": rate_limiter.stats(),
+    }
+
+
+class AdmissionMiddleware:
+    """Caps in-flight requests per route class and sheds the excess with a 503.
+
+    The slot is held until the response body has been sent, so streamed
+    proxy responses count against the limit for their whole duration.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limiter = limiters.get(route_class(scope["method"], scope["path"]))
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await limiter.acquire()
+        except Rejected as exc:
+            response = JSONResponse(
+                {"detail": "Gateway is overloaded, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(exc.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
@@ -0,0 +1,90 @@
+import os
+
+import httpx
+import jwt
+import pytest
+
+
+# The gateway reads its configuration at import time, so the environment is
+# set up before gateway_service is imported by the tests.
+INTERNAL_SECRET = "test-internal"
+SECRET_KEY = "test-secret"
+
+os.environ.update({
+    "USER_SERVICE_URL": "http://user",
+    "PRODUCT_SERVICE_URLS": "http://product",
+    "ORDER_SERVICE_URLS": "http://order",
+    "SECRET_KEY": SECRET_KEY,
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "5",
+    "INTERNAL_AUTH_SECRET": INTERNAL_SECRET,
+})
+
+
+def upstream_response(status_code=200, body=b"{}", headers=None):
+    """Unread response, so the proxy can stream it with aiter_raw like a real one.
+
+    ``body`` is bytes or an async iterator of chunks.
+    """
+    if isinstance(body, bytes):
+        return httpx.Response(status_code, headers=headers, stream=httpx.ByteStream(body))
+    return httpx.Response(status_code, headers=headers, content=body)
+
+
+class Upstream:
+    """Stands in for a product or order replica and records what the gateway sent it."""
+
+    def __init__(self):
+        self.requests = []
+        self.respond = lambda request: upstream_response()
+
+    async def handle(self, request):
+        self.requests.append(request)
+        response = self.respond(request)
+        if not isinstance(response, httpx.Response):
+            response = await response
+        return response
+
+    def reset(self):
+        self.requests.clear()
+        self.respond = lambda request: upstream_response()
+
+
+upstreams = {"user": Upstream(), "product": Upstream(), "order": Upstream()}
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    import gateway_service
+
+    services = [
+        (gateway_service.user_client, "user"),
+        *((replica, "product") for replica in gateway_service.product_pool.replicas),
+        *((replica, "order") for replica in gateway_service.order_pool.replicas),
+    ]
+    for service_client, name in services:
+        service_client.transport = httpx.MockTransport(upstreams[name].handle)
+
+    with TestClient(gateway_service.app) as client:
+        yield client
+
+
+@pytest.fixture
+def product_service(client):
+    upstreams["product"].reset()
+    return upstreams["product"]
+
+
+@pytest.fixture
+def order_service(client):
+    upstreams["order"].reset()
+    return upstreams["order"]
+
+
+@pytest.fixture
+def as_user():
+    def as_user(user_id: int) -> dict:
+        token = jwt.encode({"user_id": user_id, "email": f"user{user_id}@example.com"}, SECRET_KEY, algorithm="HS256")
+        return {"Authorization": f"Bearer {token}"}
+    return as_user
@@ -1,10 +1,19 @@
 from fastapi import FastAPI, HTTPException,Request
+import asyncio
 import httpx
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 import jwt
 import os
 
 from schema import *
+from service_common.client import ServiceClient, CircuitOpenError
+from proxy import UpstreamPool, proxy_request
+from service_common.auth import verify_token
+from admission import AdmissionMiddleware, admission_stats, enforce_rate_limit, rate_limiter, route_class
+from service_common.asgi import MetricsMiddleware, TracingMiddleware, metrics_response
+from service_common.metrics import event_loop_monitor
+from service_common.tracing import set_default_service_name
 
 
 
@@ -12,7 +21,39 @@ USER_SERVICE_URL = os.getenv('USER_SERVICE_URL')
 SECRET_KEY = os.getenv('SECRET_KEY') 
 ALGORITHM = os.getenv('ALGORITHM')  
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv('ACCESS_TOKEN_EXPIRE_MINUTES'))
-app = FastAPI()
+
+PRODUCT_SERVICE_URLS = os.getenv('PRODUCT_SERVICE_URLS')
+ORDER_SERVICE_URLS = os.getenv('ORDER_SERVICE_URLS')
+PROXY_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"]
+
+user_client = ServiceClient("user", USER_SERVICE_URL)
+product_pool = UpstreamPool("product", PRODUCT_SERVICE_URLS)
+order_pool = UpstreamPool("order", ORDER_SERVICE_URLS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await user_client.start()
+    await product_pool.start()
+    await order_pool.start()
+    # Open the downstream connections before the first request needs them.
+    app.state.ready = False
+    await asyncio.gather(user_client.warm(), product_pool.warm(), order_pool.warm())
+    app.state.ready = True
+    async with event_loop_monitor():
+        yield
+    app.state.ready = False
+    await user_client.close()
+    await product_pool.close()
+    await order_pool.close()
+    await rate_limiter.close()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+set_default_service_name("gateway")
 
 def create_access_token(data: dict, expires_delta: timedelta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)):
     to_encode = data.copy()
@@ -23,17 +64,56 @@ def create_access_token(data: dict, expires_delta: timedelta = timedelta(minutes
 
 @app.post("/login", response_model=Token)
 async def login(auth_data: AuthRequest):
-    async with httpx.AsyncClient() as client:
-        response = await client.post(f"{USER_SERVICE_URL}/login", json={"email": auth_data.email, "password": auth_data.password})
-        
-        if response.status_code != 200:
-            raise HTTPException(status_code=401, detail="Invalid credentials")
-        
-        user = response.json()
-
-        access_token = create_access_token(data={"email": user["email"], "user_id": user["id"]})
+    # Keyed by account, so one address can't be hammered with password guesses.
+    await enforce_rate_limit(f"login:{auth_data.email.lower()}", "login")
+    try:
+        response = await user_client.request("POST", "/login", json={"email": auth_data.email, "password": auth_data.password})
+    except (CircuitOpenError, httpx.HTTPError):
+        raise HTTPException(status_code=503, detail="User service unavailable")
+
+    if response.status_code == 503:
+        # Password hashing is saturated; pass the back-pressure on instead of reporting bad credentials.
+        raise HTTPException(status_code=503, detail="User service busy",
+                            headers={"Retry-After": response.headers.get("Retry-After", "1")})
+    if response.status_code != 200:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    user = response.json()
+
+    access_token = create_access_token(data={"email": user["email"], "user_id": user["id"]})
     
-    return {"access_token": access_token, "token_type": "bearer"}
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": user.get("refresh_token")}
+
+
+@app.post("/refresh", response_model=Token)
+async def refresh(data: RefreshRequest):
+    # Rotates the refresh token with a single indexed lookup; no password hashing involved.
+    try:
+        response = await user_client.request("POST", "/refresh", json={"refresh_token": data.refresh_token})
+    except (CircuitOpenError, httpx.HTTPError):
+        raise HTTPException(status_code=503, detail="User service unavailable")
+
+    if response.status_code != 200:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+    user = response.json()
+
+    access_token = create_access_token(data={"email": user["email"], "user_id": user["id"]})
+
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": user["refresh_token"]}
+
+
+@app.post("/logout")
+async def logout(data: RefreshRequest):
+    try:
+        response = await user_client.request("POST", "/logout", json={"refresh_token": data.refresh_token})
+    except (CircuitOpenError, httpx.HTTPError):
+        raise HTTPException(status_code=503, detail="User service unavailable")
+
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail="Logout failed")
+
+    return response.json()
 
 
 @app.post("/validate-token")
@@ -45,9 +125,57 @@ async def validate_token(request: Request):
     
     try:
         # Decode the token and return its payload
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = verify_token(token)
         return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
     except jwt.InvalidTokenError:
-        raise HTTPException(status_code=401, detail="Invalid token")
\ No newline at end of file
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+
+@app.get("/metrics")
+async def metrics():
+    return metrics_response()
+
+
+@app.get("/admission/stats")
+async def admission_statistics():
+    return admission_stats()
+
+
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz(request: Request):
+    # Only the gateway's own state decides readiness. An upstream outage is
+    # answered per route with 503s; taking the gateway out of rotation for
+    # it would take the healthy routes down too. Breaker states are informational.
+    upstreams = {
+        "user": user_client.breaker.state,
+        "product": [replica.breaker.state for replica in product_pool.replicas],
+        "order": [replica.breaker.state for replica in order_pool.replicas],
+    }
+    if not getattr(request.app.state, "ready", False):
+        raise HTTPException(status_code=503, detail={"status": "not ready", "upstreams": upstreams})
+    return {"status": "ready", "upstreams": upstreams}
+
+
+# Edge routing: the token is verified once here and the identity is
+# forwarded to the upstream as trusted internal headers.
+@app.api_route("/products", methods=PROXY_METHODS)
+@app.api_route("/products/{path:path}", methods=PROXY_METHODS)
+async def proxy_products(request: Request):
+    identity = await validate_token(request)
+    await enforce_rate_limit(f"user:{identity.get('user_id')}", route_class(request.method, request.url.path))
+    return await proxy_request(request, product_pool, identity)
+
+
+@app.api_route("/orders", methods=PROXY_METHODS)
+@app.api_route("/orders/{path:path}", methods=PROXY_METHODS)
+async def proxy_orders(request: Request):
+    identity = await validate_token(request)
+    await enforce_rate_limit(f"user:{identity.get('user_id')}", route_class(request.method, request.url.path))
+    return await proxy_request(request, order_pool, identity)
@@ -0,0 +1,135 @@
+import asyncio
+
+import httpx
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+from service_common.auth import INTERNAL_AUTH_SECRET
+from service_common.client import ServiceClient, CircuitOpenError
+from service_common.writes import RecentWriters
+from starlette.background import BackgroundTask
+
+
+# Connection-specific headers that must not be forwarded by a proxy (RFC 9110 7.6.1).
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "transfer-encoding", "upgrade", "host",
+}
+# Set by the gateway or by other services only; whatever a client sends is dropped.
+IDENTITY_HEADERS = {"x-internal-auth", "x-service-auth", "x-user-id", "x-user-email"}
+BODYLESS_METHODS = {"GET", "HEAD", "OPTIONS"}
+# After a write, the user's reads carry X-Read-Primary so every service
+# replica serves them from its primary database rather than a lagging replica.
+READ_PRIMARY_HEADER = "x-read-primary"
+
+
+recent_writers = RecentWriters()
+
+
+class UpstreamPool:
+    """Round-robin over the replicas of one upstream, skipping those whose breaker is open."""
+
+    def __init__(self, name: str, urls: str):
+        self.name = name
+        self.replicas = [ServiceClient(name, url.strip()) for url in (urls or "").split(",") if url.strip()]
+        self._next = 0
+
+    async def start(self):
+        for replica in self.replicas:
+            await replica.start()
+
+    async def close(self):
+        for replica in self.replicas:
+            await replica.close()
+
+    async def warm(self):
+        await asyncio.gather(*(replica.warm() for replica in self.replicas))
+
+    def pick(self) -> ServiceClient:
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[self._next % len(self.replicas)]
+            self._next += 1
+            if replica.breaker.state != "open":
+                return replica
+        raise CircuitOpenError(f"{self.name} service is unavailable")
+
+
+def forward_headers(request: Request, identity: dict) -> dict:
+    headers = {
+        name: value for name, value in request.headers.items()
+        if name not in HOP_BY_HOP_HEADERS and name not in IDENTITY_HEADERS
+    }
+    if request.client:
+        forwarded_for = request.headers.get("x-forwarded-for")
+        headers["x-forwarded-for"] = f"{forwarded_for}, {request.client.host}" if forwarded_for else request.client.host
+    if INTERNAL_AUTH_SECRET:
+        headers["x-internal-auth"] = INTERNAL_AUTH_SECRET
+        headers["x-user-id"] = str(identity.get("user_id"))
+        if identity.get("email"):
+            headers["x-user-email"] = identity["email"]
+    return headers
+
+
+def upstream_target(request: Request) -> str:
+    """Path and query exactly as the client sent them.
+
+    Re-encoding the decoded path or rebuilding the query from parsed
+    parameters would change what the upstream sees, e.g. drop repeated keys.
+    """
+    target = request.scope.get("raw_path") or request.url.path.encode()
+    target = target.decode("latin-1")
+    if request.url.query:
+        target = f"{target}?{request.url.query}"
+    return target
+
+
+async def proxy_request(request: Request, pool: UpstreamPool, identity: dict) -> StreamingResponse:
+    """Forward the request to one replica, streaming both bodies without buffering.
+
+    Bodyless requests that cannot connect are tried on the next replica;
+    anything else is sent exactly once.
+    """
+    has_body = request.method not in BODYLESS_METHODS
+    attempts = 1 if has_body else max(len(pool.replicas), 1)
+    headers = forward_headers(request, identity)
+    if not has_body and identity.get("user_id") in recent_writers:
+        headers[READ_PRIMARY_HEADER] = "1"
+    try:
+        for attempt in range(attempts):
+            replica = pool.pick()
+            try:
+                upstream = await replica.stream(
+                    request.method,
+                    upstream_target(request),
+                    headers=headers,
+                    content=request.stream() if has_body else None,
+                )
+                break
+            except httpx.ConnectError:
+                if attempt + 1 >= attempts:
+                    raise
+    except CircuitOpenError:
+        raise HTTPException(status_code=503, detail=f"{pool.name.capitalize()} service unavailable")
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=504, detail=f"{pool.name.capitalize()} service timed out")
+    except httpx.HTTPError:
+        raise HTTPException(status_code=502, detail=f"{pool.name.capitalize()} service unreachable")
+
+    if has_body and upstream.status_code < 400:
+        recent_writers.record(identity.get("user_id"))
+
+    # The gateway's own traceresponse names the root span of the same trace.
+    headers = {
+        name: value for name, value in upstream.headers.items()
+        if name not in HOP_BY_HOP_HEADERS and name != "traceresponse"
+    }
+    if "server-timing" in headers:
+        # Keep the upstream's breakdown but namespace it next to the gateway's own entries.
+        headers["server-timing"] = ", ".join(
+            f"{pool.name}-{entry.strip()}" for entry in headers["server-timing"].split(",")
+        )
+    return StreamingResponse(
+        upstream.aiter_raw(),
+        status_code=upstream.status_code,
+        headers=headers,
+        background=BackgroundTask(upstream.aclose),
+    )
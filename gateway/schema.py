@@ -1,9 +1,14 @@
 from pydantic import BaseModel
+from typing import Optional
 
 class AuthRequest(BaseModel):
     email: str
     password: str
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
 class Token(BaseModel):
     access_token: str
-    token_type: str
\ No newline at end of file
+    token_type: str
+    refresh_token: Optional[str] = None
\ No newline at end of file
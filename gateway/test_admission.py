@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+import admission
+from admission import ConcurrencyLimiter, Rejected, TokenBucketLimiter
+
+
+def test_saturated_route_class_is_shed_with_retry_after(client, product_service, as_user, monkeypatch):
+    saturated = ConcurrencyLimiter("product_reads", 0, queue_size=0, timeout=2)
+    monkeypatch.setitem(admission.limiters, "product_reads", saturated)
+
+    response = client.get("/products", headers=as_user(1))
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "2"
+    assert product_service.requests == []
+    # Other route classes are unaffected.
+    assert client.post("/products", json={}, headers=as_user(1)).status_code == 200
+
+
+def test_rate_limit_is_per_user(client, product_service, as_user, monkeypatch):
+    monkeypatch.setattr(admission, "rate_limiter", TokenBucketLimiter(rate=0.5, burst=2, redis_url=None))
+
+    assert [client.get("/products", headers=as_user(2)).status_code for _ in range(3)] == [200, 200, 429]
+    response = client.get("/products", headers=as_user(2))
+    assert response.headers["retry-after"] == "2"
+    assert client.get("/products", headers=as_user(3)).status_code == 200
+    assert len(product_service.requests) == 3
+
+
+def test_queued_request_times_out():
+    async def scenario():
+        limiter = ConcurrencyLimiter("test", 1, queue_size=5, timeout=0.05)
+        await limiter.acquire()
+        with pytest.raises(Rejected) as rejected:
+            await limiter.acquire()
+        return limiter, rejected.value
+
+    limiter, rejected = asyncio.run(scenario())
+
+    assert rejected.reason == "queue_timeout"
+    assert rejected.retry_after == 1
+    assert limiter.stats() == {"limit": 1, "active": 1, "queued": 0, "admitted": 1, "rejected": 1}
+
+
+def test_full_queue_rejects_at_once():
+    async def scenario():
+        limiter = ConcurrencyLimiter("test", 1, queue_size=1, timeout=5)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(Rejected) as rejected:
+            await limiter.acquire()
+        waiter.cancel()
+        return rejected.value
+
+    assert asyncio.run(scenario()).reason == "queue_full"
+
+
+def test_released_slot_goes_to_the_oldest_waiter():
+    async def scenario():
+        limiter = ConcurrencyLimiter("test", 1, queue_size=5, timeout=5)
+        order = []
+
+        async def request(name):
+            await limiter.acquire()
+            order.append(name)
+
+        await limiter.acquire()
+        first = asyncio.create_task(request("first"))
+        await asyncio.sleep(0)
+        limiter.release()
+        # A newcomer arriving right after the release must queue behind the waiter.
+        newcomer = asyncio.create_task(request("newcomer"))
+        await asyncio.sleep(0.01)
+        assert order == ["first"]
+        assert limiter.stats()["active"] == 1
+        limiter.release()
+        await asyncio.gather(first, newcomer)
+        limiter.release()
+        return order, limiter.stats()
+
+    order, stats = asyncio.run(scenario())
+
+    assert order == ["first", "newcomer"]
+    assert stats["active"] == 0 and stats["queued"] == 0
@@ -0,0 +1,101 @@
+import httpx
+import pytest
+
+from conftest import upstream_response
+
+
+@pytest.mark.parametrize("path", [
+    "/products/1/release",
+    "/products/+1/release",
+    "/products/1.0/release",
+    "/products/%201/release",
+    "/products/release",
+    "/products/stock-events",
+])
+def test_stock_paths_never_carry_the_service_credential(client, product_service, as_user, path):
+    headers = {**as_user(1), "X-Service-Auth": "guessed", "X-Internal-Auth": "forged", "X-User-Id": "2"}
+
+    client.post(path, json={"quantity": 1000}, headers=headers)
+
+    [request] = product_service.requests
+    # Product only lets X-Service-Auth change stock; the gateway never sends it.
+    assert "x-service-auth" not in request.headers
+    assert request.headers["x-internal-auth"] == "test-internal"
+    assert request.headers["x-user-id"] == "1"
+    assert request.url.raw_path == path.encode()
+
+
+def test_bodies_are_streamed_through(client, product_service, as_user):
+    async def chunks():
+        for chunk in (b'{"items": [', b'1, 2', b']}'):
+            yield chunk
+
+    received = []
+
+    async def respond(request):
+        received.append(request.content)
+        return upstream_response(201, chunks(), headers={"Content-Type": "application/json"})
+
+    product_service.respond = respond
+
+    def body():
+        yield b"name,price\n"
+        yield b"Widget,2.5\n"
+
+    response = client.post("/products/import", content=body(), headers=as_user(3))
+
+    assert response.status_code == 201
+    assert response.json() == {"items": [1, 2]}
+    assert received == [b"name,price\nWidget,2.5\n"]
+
+
+def test_identity_and_forwarding_headers(client, product_service, as_user):
+    product_service.respond = lambda request: upstream_response(headers={
+        "Server-Timing": "app;dur=3, db;dur=1", "Connection": "close", "traceresponse": "00-upstream",
+    })
+
+    response = client.get("/products", headers={**as_user(4), "X-Forwarded-For": "10.0.0.1", "Accept": "text/csv"})
+
+    [request] = product_service.requests
+    assert request.headers["x-user-id"] == "4"
+    assert request.headers["x-user-email"] == "user4@example.com"
+    assert request.headers["x-forwarded-for"] == "10.0.0.1, testclient"
+    assert request.headers["accept"] == "text/csv"
+    assert request.headers["traceparent"].startswith("00-")
+    # The upstream's timings are kept under its name; its hop-by-hop headers and trace id are not.
+    assert "product-app;dur=3" in response.headers["server-timing"]
+    assert "product-db;dur=1" in response.headers["server-timing"]
+    assert response.headers["traceresponse"] != "00-upstream"
+
+
+def test_query_string_is_forwarded_unchanged(client, order_service, as_user):
+    client.get("/orders?product_id=1&product_id=2&created_after=2024-01-01T00%3A00%3A00%2B00%3A00", headers=as_user(5))
+
+    [request] = order_service.requests
+    assert request.url.raw_path == b"/orders?product_id=1&product_id=2&created_after=2024-01-01T00%3A00%3A00%2B00%3A00"
+
+
+def test_writers_read_from_the_primary(client, order_service, as_user):
+    client.post("/orders", json={"product_id": 1, "quantity": 1}, headers=as_user(6))
+    client.get("/orders", headers=as_user(6))
+    client.get("/orders", headers=as_user(7))
+
+    write, own_read, other_read = order_service.requests
+    assert own_read.headers["x-read-primary"] == "1"
+    assert "x-read-primary" not in other_read.headers
+
+
+def test_requests_without_a_token_are_not_forwarded(client, product_service):
+    assert client.get("/products").status_code == 401
+    assert product_service.requests == []
+
+
+def test_unreachable_upstream_is_a_502(client, product_service, as_user):
+    def refuse(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    product_service.respond = refuse
+
+    response = client.post("/products", json={"name": "Widget"}, headers=as_user(8))
+
+    assert response.status_code == 502
@@ -0,0 +1,135 @@
+"""End-to-end load test for the gateway, user, product and order services.
+
+Usage:
+    python loadtest/run.py [--postgres postgresql://u:p@host/db] [--output results.json]
+
+Boots all four services locally (see stack.py), seeds users and a catalog,
+then runs the login storm, catalog browsing and hot-product checkout
+scenarios and writes the results as JSON.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import subprocess
+import sys
+import uuid
+
+import httpx
+
+from scenarios import browse, hot_checkout, login_storm, register_users, seed_catalog
+from stack import ROOT, Stack
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--postgres", help="throwaway PostgreSQL URL; SQLite files are used otherwise")
+    parser.add_argument("--base-port", type=int, default=18000)
+    parser.add_argument("--users", type=int, default=100, help="registered users")
+    parser.add_argument("--products", type=int, default=2000, help="catalog size")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--logins", type=int, default=500, help="login storm requests")
+    parser.add_argument("--browse", type=int, default=5000, help="catalog browsing requests")
+    parser.add_argument("--hot-stock", type=int, default=50, help="stock of the contended product")
+    parser.add_argument("--checkouts", type=int, default=500, help="checkout attempts on the hot product")
+    parser.add_argument("--settle-timeout", type=float, default=30,
+                        help="seconds to wait for orders accepted with 202 to be confirmed or rejected")
+    parser.add_argument("--output", help="result file; defaults to loadtest/results/<timestamp>.json")
+    parser.add_argument("--baseline", help="earlier result file to compare p95 and throughput against")
+    return parser.parse_args()
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_scenarios(stack: Stack, args) -> dict:
+    gateway_url = stack.url("gateway")
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        users = await register_users(client, stack.url("user"), uuid.uuid4().hex[:8], args.users, args.concurrency)
+
+        recorder, tokens = await login_storm(client, gateway_url, users, max(args.logins, args.users), args.concurrency)
+        scenarios = {"login_storm": recorder.summary()}
+        if not tokens:
+            raise RuntimeError("No login succeeded; check the user service log in " + stack.workdir)
+
+        product_ids = await seed_catalog(client, gateway_url, tokens[0], args.products)
+        scenarios["browse"] = (await browse(client, gateway_url, tokens, product_ids, args.browse, args.concurrency)).summary()
+
+        recorder, inventory = await hot_checkout(
+            client, gateway_url, tokens, args.hot_stock, args.checkouts, args.concurrency, args.settle_timeout,
+        )
+        scenarios["hot_checkout"] = dict(recorder.summary(), inventory=inventory)
+    return scenarios
+
+
+def compare(results: dict, baseline: dict):
+    for name, scenario in results["scenarios"].items():
+        for label, current in scenario["endpoints"].items():
+            previous = baseline.get("scenarios", {}).get(name, {}).get("endpoints", {}).get(label)
+            if not previous:
+                continue
+            print(
+                f"{name:13} {label:22} p95 {previous['p95_ms']:>8} -> {current['p95_ms']:>8} ms   "
+                f"rps {previous['throughput_rps']:>8} -> {current['throughput_rps']:>8}"
+            )
+
+
+def print_results(results: dict):
+    for name, scenario in results["scenarios"].items():
+        print(f"\n{name}: {scenario['requests']} requests in {scenario['duration_s']}s ({scenario['throughput_rps']} req/s)")
+        for label, endpoint in scenario["endpoints"].items():
+            print(
+                f"  {label:22} n={endpoint['requests']:<6} errors={endpoint['errors']:<4} "
+                f"p50={endpoint['p50_ms']}ms p95={endpoint['p95_ms']}ms p99={endpoint['p99_ms']}ms "
+                f"status={endpoint['status']}"
+            )
+    inventory = results["scenarios"]["hot_checkout"]["inventory"]
+    print(
+        f"\nhot product: stock {inventory['initial_stock']}, sold {inventory['units_sold']}, "
+        f"final {inventory['final_stock']}, oversold {inventory['oversold_units']}, "
+        f"still pending {inventory['pending_orders']}"
+    )
+
+
+def main():
+    args = parse_args()
+    started_at = datetime.datetime.now(datetime.timezone.utc)
+    with Stack(base_port=args.base_port, postgres_url=args.postgres) as stack:
+        scenarios = asyncio.run(run_scenarios(stack, args))
+
+    results = {
+        "started_at": started_at.isoformat(),
+        "git_revision": git_revision(),
+        "database": "postgresql" if args.postgres else "sqlite",
+        "config": {key: value for key, value in vars(args).items() if key not in ("postgres", "output", "baseline")},
+        "scenarios": scenarios,
+    }
+    print_results(results)
+
+    output = args.output or os.path.join(
+        ROOT, "loadtest", "results", started_at.strftime("%Y%m%dT%H%M%SZ") + ".json",
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nresults written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+
+    inventory = scenarios["hot_checkout"]["inventory"]
+    # Unsettled orders leave the oversell count incomplete, so they fail the run too.
+    sys.exit(1 if inventory["oversold_units"] or inventory["pending_orders"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import asyncio
+import json
+import random
+import time
+from collections import Counter, defaultdict
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Recorder:
+    """Collects latency and status per endpoint label for one scenario."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.started = time.perf_counter()
+        self.finished = None
+
+    async def call(self, client, label: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = response.status_code
+        except Exception as exc:
+            response, status = None, type(exc).__name__
+        self.latencies[label].append(time.perf_counter() - start)
+        self.statuses[label][status] += 1
+        return response
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    def summary(self) -> dict:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        endpoints = {}
+        total = 0
+        for label, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            statuses = self.statuses[label]
+            errors = sum(count for status, count in statuses.items() if not isinstance(status, int) or status >= 500)
+            total += len(values)
+            endpoints[label] = {
+                "requests": len(values),
+                "errors": errors,
+                "status": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+                "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+                "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+                "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+                "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+                "max_ms": round(values[-1] * 1000, 2),
+            }
+        return {
+            "duration_s": round(elapsed, 3),
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+            "endpoints": endpoints,
+        }
+
+
+async def run_workers(concurrency: int, total: int, job):
+    """Run ``job(i)`` for i in range(total) with at most ``concurrency`` in flight."""
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            await job(i)
+
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, total))))
+
+
+def bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def register_users(client, user_url: str, run_id: str, count: int, concurrency: int) -> list:
+    users = [(f"load-{run_id}-{i}@example.com", f"pw-{run_id}-{i}") for i in range(count)]
+
+    async def register(i):
+        email, password = users[i]
+        while True:
+            response = await client.post(f"{user_url}/register", json={"email": email, "password": password})
+            if response.status_code != 503:
+                break
+            # The hasher sheds load when its queue is full; setup just waits its turn.
+            await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+        response.raise_for_status()
+
+    await run_workers(concurrency, count, register)
+    return users
+
+
+async def seed_catalog(client, gateway_url: str, token: str, count: int) -> list:
+    lines = "".join(
+        json.dumps({"name": f"Load product {i}", "price": round(random.uniform(1, 500), 2), "stock": 1_000_000}) + "\n"
+        for i in range(count)
+    )
+    response = await client.post(
+        f"{gateway_url}/products/import",
+        content=lines.encode(),
+        headers={**bearer(token), "Content-Type": "application/x-ndjson"},
+    )
+    response.raise_for_status()
+
+    product_ids, cursor = [], None
+    while True:
+        params = {"limit": 500, "fields": "id"}
+        if cursor is not None:
+            params["cursor"] = cursor
+        response = await client.get(f"{gateway_url}/products", params=params, headers=bearer(token))
+        response.raise_for_status()
+        page = response.json()
+        product_ids.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return product_ids
+
+
+async def login_storm(client, gateway_url: str, users: list, requests: int, concurrency: int):
+    """Concurrent logins through the gateway; returns the recorder and one token per user."""
+    recorder = Recorder()
+    tokens = {}
+
+    async def login(i):
+        email, password = users[i % len(users)]
+        response = await recorder.call(
+            client, "POST /login", "POST", f"{gateway_url}/login",
+            json={"email": email, "password": password},
+        )
+        if response is not None and response.status_code == 200:
+            tokens[email] = response.json()["access_token"]
+
+    await run_workers(concurrency, requests, login)
+    recorder.stop()
+    return recorder, list(tokens.values())
+
+
+async def browse(client, gateway_url: str, tokens: list, product_ids: list, requests: int, concurrency: int):
+    """Catalog reads: product detail, list pages and name search."""
+    recorder = Recorder()
+    words = ["load", "product", "prod", "lod", "1", "42"]
+
+    async def visit(i):
+        headers = bearer(tokens[i % len(tokens)])
+        roll = random.random()
+        if roll < 0.5:
+            product_id = random.choice(product_ids)
+            await recorder.call(client, "GET /products/{id}", "GET", f"{gateway_url}/products/{product_id}", headers=headers)
+        elif roll < 0.8:
+            params = {"limit": 50}
+            if random.random() < 0.5:
+                params["cursor"] = random.choice(product_ids)
+            await recorder.call(client, "GET /products", "GET", f"{gateway_url}/products", params=params, headers=headers)
+        else:
+            params = {"q": random.choice(words), "limit": 20}
+            await recorder.call(client, "GET /products/search", "GET", f"{gateway_url}/products/search", params=params, headers=headers)
+
+    await run_workers(concurrency, requests, visit)
+    recorder.stop()
+    return recorder
+
+
+async def settle_orders(client, gateway_url: str, orders: list, timeout: float, concurrency: int) -> Counter:
+    """Poll ``(order_id, token)`` pairs accepted with 202 until the outbox relay settles them.
+
+    Returns a count per final status; orders still pending at the deadline
+    are counted as "pending".
+    """
+    deadline = time.monotonic() + timeout
+    statuses = Counter()
+
+    async def settle(i):
+        order_id, token = orders[i]
+        while True:
+            response = await client.get(
+                f"{gateway_url}/orders/{order_id}", headers={**bearer(token), "X-Read-Primary": "1"},
+            )
+            status = response.json()["status"] if response.status_code == 200 else "pending"
+            if status != "pending" or time.monotonic() >= deadline:
+                statuses[status] += 1
+                return
+            await asyncio.sleep(0.2)
+
+    await run_workers(concurrency, len(orders), settle)
+    return statuses
+
+
+async def hot_checkout(client, gateway_url: str, tokens: list, stock: int, attempts: int, concurrency: int,
+                       settle_timeout: float = 30):
+    """Many users ordering one unit of the same low-stock product at once.
+
+    Oversold units are units confirmed to buyers beyond the initial stock,
+    or stock that went negative; either means the reservation raced. With
+    ORDER_STOCK_MODE=outbox orders are accepted with 202 and only count as
+    sold once the relay has confirmed them.
+    """
+    response = await client.post(
+        f"{gateway_url}/products",
+        json={"name": "Hot product", "price": 9.99, "stock": stock},
+        headers=bearer(tokens[0]),
+    )
+    response.raise_for_status()
+    product_id = response.json()["id"]
+
+    recorder = Recorder()
+    sold = 0
+    accepted = []
+
+    async def checkout(i):
+        nonlocal sold
+        token = tokens[i % len(tokens)]
+        response = await recorder.call(
+            client, "POST /orders", "POST", f"{gateway_url}/orders",
+            json={"product_id": product_id, "quantity": 1},
+            headers=bearer(token),
+        )
+        if response is None:
+            return
+        if response.status_code in (200, 201):
+            sold += 1
+        elif response.status_code == 202:
+            accepted.append((response.json()["id"], token))
+
+    await run_workers(concurrency, attempts, checkout)
+    recorder.stop()
+
+    settled = await settle_orders(client, gateway_url, accepted, settle_timeout, concurrency)
+    sold += settled["confirmed"]
+
+    response = await client.get(f"{gateway_url}/products/{product_id}", headers=bearer(tokens[0]))
+    response.raise_for_status()
+    final_stock = response.json()["stock"]
+    inventory = {
+        "product_id": product_id,
+        "initial_stock": stock,
+        "attempts": attempts,
+        "accepted_orders": len(accepted),
+        "rejected_orders": settled["rejected"],
+        # Still pending after settle_timeout; the relay is behind or not running, so the counts are incomplete.
+        "pending_orders": settled["pending"],
+        "units_sold": sold,
+        "final_stock": final_stock,
+        "oversold_units": max(sold - stock, -final_stock, 0),
+        "stock_mismatch": stock - sold - final_stock,
+    }
+    return recorder, inventory
@@ -0,0 +1,137 @@
+"""Microbenchmark of the JSON paths for large product and order list pages.
+
+Usage:
+    python loadtest/serialization.py [--rows 10000] [--repeat 20]
+
+Product pages are served by a throwaway FastAPI app over an in-process
+ASGI transport, so the timings include FastAPI's response-model handling
+but no network or database. Order pages are rendered with the DRF
+serializer and renderers directly. Needs the product and order
+requirements installed.
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import statistics
+import sys
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "product"), os.path.join(ROOT, "order", "order_project")]
+
+
+def timed(function, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def product_rows(count: int) -> list:
+    return [(i, f"product {i}", 9.99 + i, i % 50, 1 + i % 7) for i in range(1, count + 1)]
+
+
+def bench_products(rows: list, repeat: int) -> list:
+    import httpx
+    from fastapi import FastAPI
+    from fastapi.responses import ORJSONResponse
+
+    from schemas import ProductPage, ProductResponse
+
+    columns = list(ProductResponse.model_fields)
+    app = FastAPI()
+
+    @app.get("/models", response_model=list[ProductResponse])
+    async def as_models():
+        return [ProductResponse(**dict(zip(columns, row))) for row in rows]
+
+    @app.get("/stdlib", response_model=ProductPage)
+    async def as_page():
+        return {"items": [dict(zip(columns, row)) for row in rows], "next_cursor": None}
+
+    @app.get("/orjson", response_model=ProductPage)
+    async def as_orjson():
+        return ORJSONResponse({"items": [dict(zip(columns, row)) for row in rows], "next_cursor": None})
+
+    async def run():
+        results = []
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for path, label in (
+                ("/models", "response_model=list[ProductResponse] + json"),
+                ("/stdlib", "row dicts, ProductPage validation + json"),
+                ("/orjson", "row dicts straight to orjson"),
+            ):
+                await client.get(path)
+                samples = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    response = await client.get(path)
+                    samples.append(time.perf_counter() - started)
+                response.raise_for_status()
+                results.append((label, statistics.median(samples) * 1000, len(response.content)))
+        return results
+
+    return asyncio.run(run())
+
+
+def bench_orders(count: int, repeat: int) -> list:
+    import django
+    from django.conf import settings
+
+    settings.configure(
+        INSTALLED_APPS=["rest_framework", "order_app"], USE_TZ=True, TIME_ZONE="UTC",
+        DATABASES={}, DEFAULT_AUTO_FIELD="django.db.models.BigAutoField",
+    )
+    django.setup()
+
+    from rest_framework.renderers import JSONRenderer
+
+    from order_app.models import Order
+    from order_app.renderers import ORJSONRenderer
+    from order_app.serializers import OrderResponseSerializer
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    fields = OrderResponseSerializer.Meta.fields
+    orders = [
+        Order(
+            id=i, product_id=i % 100, quantity=1 + i % 3, total_price=9.99 * (1 + i % 3), user_id=1,
+            checkout_id=uuid.uuid4(), status=Order.STATUS_CONFIRMED,
+            created_at=now - datetime.timedelta(seconds=i), updated_at=now,
+        )
+        for i in range(1, count + 1)
+    ]
+    rows = [{field: getattr(order, field) for field in fields} for order in orders]
+
+    cases = (
+        ("ModelSerializer(many=True) + JSONRenderer",
+         lambda: JSONRenderer().render({"results": OrderResponseSerializer(orders, many=True).data})),
+        ("values() rows + JSONRenderer", lambda: JSONRenderer().render({"results": rows})),
+        ("values() rows + ORJSONRenderer", lambda: ORJSONRenderer().render({"results": rows})),
+    )
+    return [(label, timed(render, repeat), len(render())) for label, render in cases]
+
+
+def report(title: str, results: list):
+    baseline = results[0][1]
+    print(f"\n{title}")
+    for label, elapsed, size in results:
+        print(f"  {label:<45} {elapsed:9.2f}ms  {size / 1024:8.0f} KiB  {baseline / elapsed:6.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000, help="rows per page")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per case; the median is shown")
+    args = parser.parse_args()
+
+    report(f"product list, {args.rows} rows", bench_products(product_rows(args.rows), args.repeat))
+    report(f"order list, {args.rows} rows", bench_orders(args.rows, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
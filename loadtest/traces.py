@@ -0,0 +1,93 @@
+"""Print the slowest traces from span JSON-lines files, with their critical path.
+
+Usage:
+    python loadtest/traces.py spans.jsonl [more.jsonl ...] [--top 5] [--trace TRACE_ID]
+
+The files are what the services write to TRACE_EXPORT_FILE. Spans on the
+critical path (at each level, the child that finished last) are marked
+with ``*``.
+"""
+import argparse
+import json
+from collections import defaultdict
+
+
+def load_spans(paths: list) -> dict:
+    traces = defaultdict(list)
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    span = json.loads(line)
+                    traces[span["trace_id"]].append(span)
+    return traces
+
+
+def end_time(span: dict) -> float:
+    return span["start_time"] + span["duration_ms"] / 1000
+
+
+def build_tree(spans: list):
+    """Return ``(roots, children)``; spans whose parent was not exported count as roots."""
+    by_id = {span["span_id"]: span for span in spans}
+    children = defaultdict(list)
+    roots = []
+    for span in spans:
+        if span["parent_id"] in by_id:
+            children[span["parent_id"]].append(span)
+        else:
+            roots.append(span)
+    for siblings in children.values():
+        siblings.sort(key=lambda span: span["start_time"])
+    roots.sort(key=lambda span: span["start_time"])
+    return roots, children
+
+
+def critical_path(root: dict, children: dict) -> set:
+    path = set()
+    span = root
+    while span is not None:
+        path.add(span["span_id"])
+        span = max(children.get(span["span_id"], []), key=end_time, default=None)
+    return path
+
+
+def print_tree(span: dict, children: dict, path: set, origin: float, depth: int = 0):
+    marker = "*" if span["span_id"] in path else " "
+    offset = (span["start_time"] - origin) * 1000
+    detail = span["attributes"].get("db.statement") or span["attributes"].get("http.status_code", "")
+    print(
+        f"{marker} {offset:8.2f}ms {span['duration_ms']:9.2f}ms  {'  ' * depth}"
+        f"[{span['service']}] {span['name']} {' '.join(str(detail).split())[:80]}"
+        + ("  ERROR" if span["status"] == "error" else "")
+    )
+    for child in children.get(span["span_id"], []):
+        print_tree(child, children, path, origin, depth + 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--top", type=int, default=5, help="number of slowest traces to show")
+    parser.add_argument("--trace", help="show only this trace id")
+    args = parser.parse_args()
+
+    traces = load_spans(args.files)
+    if args.trace:
+        selected = [args.trace] if args.trace in traces else []
+    else:
+        duration = {
+            trace_id: max(end_time(span) for span in spans) - min(span["start_time"] for span in spans)
+            for trace_id, spans in traces.items()
+        }
+        selected = sorted(duration, key=duration.get, reverse=True)[:args.top]
+
+    for trace_id in selected:
+        roots, children = build_tree(traces[trace_id])
+        print(f"\ntrace {trace_id}")
+        for root in roots:
+            print_tree(root, children, critical_path(root, children), roots[0]["start_time"])
+
+
+if __name__ == "__main__":
+    main()
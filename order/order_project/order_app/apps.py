@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class OrderAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'order_app'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from .metrics import install_query_timer
+        from .tracing import install_query_tracer
+
+        connection_created.connect(install_query_timer)
+        connection_created.connect(install_query_tracer)
@@ -0,0 +1,163 @@
+import datetime
+import gzip
+import json
+import os
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Order
+from . import partitions
+
+
+ORDER_ARCHIVE_DIR = os.getenv("ORDER_ARCHIVE_DIR", os.path.join(settings.BASE_DIR, "archive"))
+ORDER_RETENTION_MONTHS = int(os.getenv("ORDER_RETENTION_MONTHS", "12"))
+ARCHIVE_FIELDS = ["id", "product_id", "quantity", "total_price", "user_id", "checkout_id", "status",
+                  "created_at", "updated_at"]
+MANIFEST = "manifest.json"
+
+
+def archive_path(month, directory=None):
+    return os.path.join(directory or ORDER_ARCHIVE_DIR, f"orders-{month:%Y-%m}.ndjson.gz")
+
+
+def read_manifest(directory=None):
+    try:
+        with open(os.path.join(directory or ORDER_ARCHIVE_DIR, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"months": {}}
+
+
+def replace_file(path, write):
+    """Write ``path`` through a temporary file so readers never see a partial archive."""
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def write_month(month, rows, directory=None):
+    """Store ``rows`` (dicts of ARCHIVE_FIELDS) as the archive of ``month``.
+
+    Rows already archived for that month are kept, so a month can be
+    archived in several runs and a rerun after a crash is harmless.
+    Returns the number of rows in the file.
+    """
+    directory = directory or ORDER_ARCHIVE_DIR
+    os.makedirs(directory, exist_ok=True)
+    path = archive_path(month, directory)
+    encoder = JSONEncoder()
+    ids = set()
+
+    def write(f):
+        with gzip.GzipFile(fileobj=f, mode="wb") as out:
+            for row in rows:
+                ids.add(row["id"])
+                out.write((encoder.encode(row) + "\n").encode())
+            if os.path.exists(path):
+                with gzip.open(path, "rt") as existing:
+                    for line in existing:
+                        order_id = json.loads(line)["id"]
+                        if order_id not in ids:
+                            ids.add(order_id)
+                            out.write(line.encode())
+
+    replace_file(path, write)
+
+    manifest = read_manifest(directory)
+    manifest["months"][f"{month:%Y-%m}"] = {
+        "file": os.path.basename(path),
+        "rows": len(ids),
+        "min_id": min(ids, default=None),
+        "max_id": max(ids, default=None),
+        "archived_at": timezone.now().isoformat(),
+    }
+    replace_file(os.path.join(directory, MANIFEST), lambda f: f.write(json.dumps(manifest, indent=2).encode()))
+    return len(ids)
+
+
+def archived_until(directory=None):
+    """First day after the newest archived month, or None if nothing is archived."""
+    months = read_manifest(directory)["months"]
+    if not months:
+        return None
+    newest = datetime.datetime.strptime(max(months), "%Y-%m").date()
+    return partitions.next_month(newest)
+
+
+def find_archived_order(order_id, user_id, directory=None):
+    """Look ``order_id`` up in the archive; returns the stored row or None.
+
+    The manifest's id ranges narrow the search to the months that can
+    hold the order, which are then scanned.
+    """
+    directory = directory or ORDER_ARCHIVE_DIR
+    for entry in read_manifest(directory)["months"].values():
+        if entry["min_id"] is None or not entry["min_id"] <= order_id <= entry["max_id"]:
+            continue
+        with gzip.open(os.path.join(directory, entry["file"]), "rt") as f:
+            for line in f:
+                row = json.loads(line)
+                if row["id"] == order_id:
+                    return row if row["user_id"] == user_id else None
+    return None
+
+
+def cutoff_month(keep_months, today=None):
+    """First month kept in the live table; everything before it is archived."""
+    month = partitions.month_start(today or timezone.localdate())
+    for _ in range(keep_months - 1):
+        month = (month - datetime.timedelta(days=1)).replace(day=1)
+    return month
+
+
+def archive_partition(month, directory=None):
+    """Detach a PostgreSQL partition, write it to the archive, then drop it."""
+    if partitions.monthly_tables().get(month):
+        partitions.detach_partition(month)
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {', '.join(ARCHIVE_FIELDS)} FROM {partitions.partition_name(month)} ORDER BY id")
+        rows = (dict(zip(ARCHIVE_FIELDS, row)) for row in cursor)
+        count = write_month(month, rows, directory)
+    partitions.drop_table(month)
+    return count
+
+
+def archive_rows(month, directory=None):
+    """Archive and delete the orders of ``month`` still in the live table.
+
+    This is how databases without partitions (SQLite) are archived, and
+    how PostgreSQL rows that ended up in the default partition are moved.
+    """
+    start, end = month, partitions.next_month(month)
+    bounds = (
+        timezone.make_aware(datetime.datetime.combine(start, datetime.time.min)),
+        timezone.make_aware(datetime.datetime.combine(end, datetime.time.min)),
+    )
+    with transaction.atomic():
+        orders = Order.objects.select_for_update().filter(created_at__gte=bounds[0], created_at__lt=bounds[1])
+        if not orders.exists():
+            return 0
+        write_month(month, orders.order_by("id").values(*ARCHIVE_FIELDS).iterator(), directory)
+        return orders.delete()[0]
+
+
+def months_to_archive(cutoff):
+    """Months before ``cutoff`` that still have orders, as ``(month, is_partition)``."""
+    months = set()
+    tables = partitions.monthly_tables() if partitions.is_partitioned() else {}
+    for month in tables:
+        if month < cutoff:
+            months.add((month, True))
+    old_rows = Order.objects.filter(
+        created_at__lt=timezone.make_aware(datetime.datetime.combine(cutoff, datetime.time.min)),
+    )
+    for moment in old_rows.dates("created_at", "month"):
+        if moment not in tables:
+            months.add((moment, False))
+    return sorted(months)
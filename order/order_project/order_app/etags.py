@@ -0,0 +1,37 @@
+import hashlib
+
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def timestamp_micros(moment) -> int:
+    return int(moment.timestamp()) * 1_000_000 + moment.microsecond
+
+
+def order_etag(order) -> str:
+    # updated_at moves on every write (auto_now, and set explicitly by bulk updates).
+    return f'"{order.id}-{timestamp_micros(order.updated_at)}"'
+
+
+def page_etag(count, last_updated, id_sum) -> str:
+    """ETag of a list page from the rows in its window.
+
+    A write to any row moves the newest ``updated_at``; rows entering or
+    leaving the window change the count and the id sum.
+    """
+    last_updated = timestamp_micros(last_updated) if last_updated else 0
+    digest = hashlib.blake2b(f"{count}:{last_updated}:{id_sum or 0}".encode(), digest_size=8)
+    return f'"p{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match, etag) -> bool:
+    """Weak comparison of an If-None-Match header against ``etag`` (RFC 9110 13.1.2)."""
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def not_modified(etag) -> Response:
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
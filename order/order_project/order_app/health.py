@@ -0,0 +1,78 @@
+import asyncio
+import os
+
+from asgiref.sync import sync_to_async
+from django.db import DatabaseError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.http import JsonResponse
+from django.urls import get_resolver
+
+from .replicas import check_replicas, monitor_replicas
+
+
+READINESS_TIMEOUT = float(os.getenv("READINESS_TIMEOUT", "1"))
+
+# False while the ASGI lifespan is warming up; stays True when served without one.
+ready = True
+_migrated = False
+
+
+def check_database():
+    """SELECT 1, plus a one-off check that every migration has been applied."""
+    global _migrated
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        if not _migrated:
+            executor = MigrationExecutor(connection)
+            _migrated = not executor.migration_plan(executor.loader.graph.leaf_nodes())
+        return _migrated
+    except DatabaseError:
+        return False
+
+
+async def database_ready(timeout: float = READINESS_TIMEOUT) -> bool:
+    try:
+        return await asyncio.wait_for(sync_to_async(check_database)(), timeout)
+    except asyncio.TimeoutError:
+        return False
+
+
+async def warm_up():
+    """Import the views, check the schema and open the product service connection."""
+    from .views import product_client
+
+    get_resolver().url_patterns
+    await database_ready(timeout=None)
+    await check_replicas()
+    await product_client.warm()
+
+
+async def lifespan(scope, receive, send):
+    global ready
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            ready = False
+            await warm_up()
+            ready = True
+            monitor = asyncio.create_task(monitor_replicas())
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            from .views import product_client
+
+            ready = False
+            monitor.cancel()
+            await product_client.close()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def healthz(request):
+    return JsonResponse({"status": "ok"})
+
+
+async def readyz(request):
+    if not ready or not await database_ready():
+        return JsonResponse({"detail": "Not ready"}, status=503)
+    return JsonResponse({"status": "ready"})
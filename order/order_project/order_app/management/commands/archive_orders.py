@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from order_app import archive, partitions
+
+
+class Command(BaseCommand):
+    help = "Move orders older than the retention window to compressed archive files."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep-months", type=int, default=archive.ORDER_RETENTION_MONTHS,
+                            help="months kept in the live table, the current one included")
+        parser.add_argument("--create-ahead", type=int, default=2,
+                            help="future monthly partitions to create (PostgreSQL only)")
+        parser.add_argument("--dry-run", action="store_true", help="list the months that would be archived")
+
+    def handle(self, *args, keep_months, create_ahead, dry_run, **options):
+        if keep_months < 1:
+            raise CommandError("--keep-months must be at least 1")
+
+        partitioned = partitions.is_partitioned()
+        if partitioned and not dry_run:
+            for month in partitions.ensure_partitions(create_ahead):
+                self.stdout.write(f"Created partition {partitions.partition_name(month)}")
+
+        cutoff = archive.cutoff_month(keep_months)
+        for month, is_partition in archive.months_to_archive(cutoff):
+            if dry_run:
+                self.stdout.write(f"Would archive {month:%Y-%m}")
+                continue
+            rows = archive.archive_partition(month) if is_partition else archive.archive_rows(month)
+            self.stdout.write(f"Archived {rows} orders from {month:%Y-%m} to {archive.archive_path(month)}")
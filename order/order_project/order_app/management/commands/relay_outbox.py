@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections
+
+from order_app.outbox import OUTBOX_BATCH_SIZE, RelayError, product_client, relay_batch
+
+
+class Command(BaseCommand):
+    help = "Deliver pending stock events from the order outbox to the product service."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="exit once the outbox is empty")
+        parser.add_argument("--batch-size", type=int, default=OUTBOX_BATCH_SIZE)
+        parser.add_argument("--interval", type=float, default=0.5, help="seconds to wait when idle or after an error")
+
+    def handle(self, *args, once=False, batch_size=OUTBOX_BATCH_SIZE, interval=0.5, **options):
+        delivered = 0
+        try:
+            client = product_client()
+        except RelayError as exc:
+            raise CommandError(str(exc))
+
+        with client:
+            while True:
+                try:
+                    count = relay_batch(client, batch_size)
+                except RelayError as exc:
+                    if once:
+                        raise CommandError(f"Delivery failed: {exc}")
+                    self.stderr.write(f"Delivery failed, will retry: {exc}")
+                    time.sleep(interval)
+                    continue
+                except DatabaseError as exc:
+                    # e.g. "database is locked" on SQLite, or a dropped connection; the batch
+                    # rolled back, so its events are still pending and the next pass retries them.
+                    if once:
+                        raise CommandError(f"Outbox read failed: {exc}")
+                    self.stderr.write(f"Outbox read failed, will retry: {exc}")
+                    close_old_connections()
+                    time.sleep(interval)
+                    continue
+
+                delivered += count
+                if count < batch_size:
+                    if once:
+                        break
+                    time.sleep(interval)
+
+        self.stdout.write(f"Delivered {delivered} events")
@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import HttpResponse
+from service_common.metrics import (
+    Counter, RequestTimings, current_timings, record_query, record_request, registry, sample_event_loop_lag,
+    track_queries,
+)
+
+
+track_queries()
+
+stock_compensations = registry.register(Counter(
+    "order_stock_compensations_total",
+    "Stock changes undone because their order rows could not be written.",
+    ("action", "outcome"),
+))
+
+
+def time_query(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        result = execute(sql, params, many, context)
+    except Exception as exc:
+        record_query(time.perf_counter() - started, exc)
+        raise
+    record_query(time.perf_counter() - started)
+    return result
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """``connection_created`` receiver; Django keeps one connection per thread."""
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+_monitored_loop = None
+
+
+def ensure_event_loop_monitor():
+    # Django has no lifespan hook, so the sampler starts with the first async request on each loop.
+    global _monitored_loop
+    loop = asyncio.get_running_loop()
+    if _monitored_loop is not loop:
+        _monitored_loop = loop
+        loop.create_task(sample_event_loop_lag())
+
+
+class MetricsMiddleware:
+    """Records request histograms and adds a ``Server-Timing`` header."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        ensure_event_loop_monitor()
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.finish(request, response, timings)
+
+    def finish(self, request, response, timings):
+        # Label by URL pattern rather than raw path so ids don't explode the series count.
+        match = request.resolver_match
+        route = "/" + match.route if match else "unmatched"
+        record_request(request.method, route, response.status_code, timings)
+        response["Server-Timing"] = timings.server_timing()
+        return response
+
+
+def metrics_view(request):
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4")
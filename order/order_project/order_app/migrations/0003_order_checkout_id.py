@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order_app', '0002_order_created_at_order_product_id_order_total_price_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='checkout_id',
+            field=models.UUIDField(blank=True, db_index=True, null=True),
+        ),
+    ]
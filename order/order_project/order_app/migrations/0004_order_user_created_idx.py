@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-18 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order_app', '0003_order_checkout_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user_id', '-created_at', '-id'], name='order_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.4 on 2026-10-18 15:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order_app', '0005_order_status_outboxevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductDailySales',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('product_id', models.IntegerField()),
+                ('day', models.DateField()),
+                ('order_count', models.IntegerField(default=0)),
+                ('quantity', models.BigIntegerField(default=0)),
+                ('revenue', models.FloatField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='product_daily_sales_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product_id', 'day'), name='product_daily_sales_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='UserDailySales',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('user_id', models.IntegerField()),
+                ('day', models.DateField()),
+                ('order_count', models.IntegerField(default=0)),
+                ('quantity', models.BigIntegerField(default=0)),
+                ('revenue', models.FloatField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user_id', 'day'), name='user_daily_sales_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,95 @@
+"""Turn order_app_order into a table range-partitioned by month on created_at.
+
+PostgreSQL only; other databases keep the plain table and archive_orders
+emulates partitions with range deletes. The rows are copied into the new
+partitioned table inside the migration's transaction, so allow for the
+time and disk of one full copy on large tables. The primary key becomes
+(id, created_at) because a partitioned table's keys must include the
+partition column; nothing references orders by foreign key.
+"""
+import datetime
+
+from django.db import migrations
+
+
+TABLE = "order_app_order"
+PARTITIONS_AHEAD = 2
+
+
+def next_month(day):
+    return (day.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+
+
+def index_definitions(cursor, table):
+    cursor.execute(
+        "SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s AND indexname <> %s",
+        [table, f"{table}_pkey"],
+    )
+    # Indexes of a partitioned table are listed as "ON ONLY"; recreate them normally.
+    return [row[0].replace(" ON ONLY ", " ON ") for row in cursor.fetchall()]
+
+
+def partition_orders(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        indexes = index_definitions(cursor, TABLE)
+        cursor.execute(f"SELECT min(created_at)::date, max(id) FROM {TABLE}")
+        oldest, max_id = cursor.fetchone()
+
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_unpartitioned")
+        cursor.execute(
+            f"CREATE TABLE {TABLE} (LIKE {TABLE}_unpartitioned INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)"
+        )
+
+        month = (oldest or datetime.date.today()).replace(day=1)
+        last = datetime.date.today().replace(day=1)
+        for _ in range(PARTITIONS_AHEAD):
+            last = next_month(last)
+        while month <= last:
+            cursor.execute(
+                f"CREATE TABLE {TABLE}_p{month:%Y%m} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)",
+                [month, next_month(month)],
+            )
+            month = next_month(month)
+        cursor.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+
+        cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {TABLE}_unpartitioned")
+        # Drops the old indexes, primary key and identity sequence, freeing their names.
+        cursor.execute(f"DROP TABLE {TABLE}_unpartitioned")
+
+        cursor.execute(f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id, created_at)")
+        cursor.execute(f"CREATE SEQUENCE {TABLE}_id_seq AS bigint OWNED BY {TABLE}.id")
+        cursor.execute(f"SELECT setval('{TABLE}_id_seq', %s, %s)", [max_id or 1, max_id is not None])
+        cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{TABLE}_id_seq')")
+        for definition in indexes:
+            cursor.execute(definition)
+
+
+def unpartition_orders(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        indexes = index_definitions(cursor, TABLE)
+        cursor.execute(f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY NONE")
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_partitioned")
+        cursor.execute(f"CREATE TABLE {TABLE} (LIKE {TABLE}_partitioned INCLUDING DEFAULTS)")
+        cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {TABLE}_partitioned")
+        cursor.execute(f"DROP TABLE {TABLE}_partitioned CASCADE")
+        cursor.execute(f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id)")
+        cursor.execute(f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id")
+        for definition in indexes:
+            cursor.execute(definition)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order_app', '0006_daily_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_orders, unpartition_orders),
+    ]
@@ -1,11 +1,94 @@
+import uuid
+
 from django.db import models
 
+
 class Order(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_CONFIRMED = 'confirmed'
+    STATUS_REJECTED = 'rejected'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_CONFIRMED, 'Confirmed'),
+        (STATUS_REJECTED, 'Rejected'),
+    ]
+
     id = models.BigAutoField(primary_key=True)
     product_id = models.IntegerField()
     quantity = models.PositiveIntegerField()
     total_price = models.FloatField()
     user_id = models.IntegerField()
+    checkout_id = models.UUIDField(null=True, blank=True, db_index=True)
+    # Orders placed through the outbox stay pending until the product service applies their stock event.
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_CONFIRMED)
 
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
\ No newline at end of file
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_id', '-created_at', '-id'], name='order_user_created_idx'),
+        ]
+
+
+class OutboxEvent(models.Model):
+    """Stock change waiting to be delivered to the product service.
+
+    Written in the same transaction as the orders it belongs to and
+    delivered by the ``relay_outbox`` command. Orders are referenced by id
+    only, without a foreign key. Compensating changes, which undo stock
+    for orders that were never written, have no orders.
+    """
+    TYPE_STOCK_RESERVE = 'stock.reserve'
+    TYPE_STOCK_RELEASE = 'stock.release'
+
+    id = models.BigAutoField(primary_key=True)
+    event_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    event_type = models.CharField(max_length=32)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    published_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['id'],
+                name='outbox_unpublished_idx',
+                condition=models.Q(published_at__isnull=True),
+            ),
+        ]
+
+
+class ProductDailySales(models.Model):
+    """Confirmed orders per product and day, kept up to date by order_app.rollups."""
+    id = models.BigAutoField(primary_key=True)
+    product_id = models.IntegerField()
+    day = models.DateField()
+    order_count = models.IntegerField(default=0)
+    quantity = models.BigIntegerField(default=0)
+    revenue = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product_id', 'day'], name='product_daily_sales_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='product_daily_sales_day_idx'),
+        ]
+
+
+class UserDailySales(models.Model):
+    """Confirmed orders per user and day, kept up to date by order_app.rollups."""
+    id = models.BigAutoField(primary_key=True)
+    user_id = models.IntegerField()
+    day = models.DateField()
+    order_count = models.IntegerField(default=0)
+    quantity = models.BigIntegerField(default=0)
+    revenue = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user_id', 'day'], name='user_daily_sales_uniq'),
+        ]
@@ -0,0 +1,116 @@
+import logging
+import os
+
+import httpx
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from service_common.auth import SERVICE_AUTH_SECRET
+
+from .models import Order, OutboxEvent
+from .replicas import recent_writers
+from .rollups import record_orders
+
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_SERVICE_URL = os.getenv("PRODUCT_SERVICE_URL")
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+
+
+class RelayError(Exception):
+    pass
+
+
+def enqueue_orders(orders, items):
+    """Insert pending orders and their stock reservation event in one transaction."""
+    with transaction.atomic():
+        orders = Order.objects.bulk_create(orders)
+        OutboxEvent.objects.create(
+            event_type=OutboxEvent.TYPE_STOCK_RESERVE,
+            payload={"order_ids": [order.id for order in orders], "items": items},
+        )
+    recent_writers.record(orders[0].user_id)
+    return orders
+
+
+def enqueue_stock_change(event_type, items):
+    """Queue a stock change that has no orders, e.g. releasing a reservation whose orders failed to save."""
+    return OutboxEvent.objects.create(event_type=event_type, payload={"items": items})
+
+
+def product_client():
+    if not SERVICE_AUTH_SECRET:
+        raise RelayError("SERVICE_AUTH_SECRET must be set to deliver stock events")
+    return httpx.Client(
+        base_url=PRODUCT_SERVICE_URL,
+        headers={"X-Service-Auth": SERVICE_AUTH_SECRET},
+        timeout=float(os.getenv("SERVICE_TIMEOUT", "5")),
+    )
+
+
+def apply_result(event, result, now):
+    """Confirm or reject the orders of a delivered reservation event."""
+    order_ids = event.payload["order_ids"]
+    pending = Order.objects.filter(id__in=order_ids, status=Order.STATUS_PENDING)
+    if result["status"] != "applied":
+        pending.update(status=Order.STATUS_REJECTED, updated_at=now)
+        return
+
+    prices = {row["id"]: row["price"] for row in result["items"]}
+    orders = list(pending)
+    for order in orders:
+        order.status = Order.STATUS_CONFIRMED
+        order.total_price = prices[order.product_id] * order.quantity
+        order.updated_at = now
+    Order.objects.bulk_update(orders, ["status", "total_price", "updated_at"])
+    record_orders(orders)
+
+
+def relay_batch(client, batch_size=OUTBOX_BATCH_SIZE):
+    """Deliver the oldest undelivered events; returns how many were delivered.
+
+    Rows are locked with SKIP LOCKED where the database supports it, so
+    several relays can run side by side. The product service applies each
+    event at most once, so a batch that is resent after a crash or timeout
+    is harmless. Raises ``RelayError`` if the batch could not be delivered.
+    """
+    error = None
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(published_at__isnull=True)
+            .order_by("id")[:batch_size]
+        )
+        if not events:
+            return 0
+
+        body = {"events": [
+            {"event_id": str(event.event_id), "type": event.event_type, "items": event.payload["items"]}
+            for event in events
+        ]}
+        try:
+            response = client.post("/stock-events", json=body)
+            response.raise_for_status()
+        except httpx.HTTPError as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            OutboxEvent.objects.filter(id__in=[event.id for event in events]).update(
+                attempts=F("attempts") + 1, last_error=error[:1000],
+            )
+        else:
+            results = {result["event_id"]: result for result in response.json()}
+            now = timezone.now()
+            for event in events:
+                result = results[str(event.event_id)]
+                if "order_ids" in event.payload:
+                    apply_result(event, result, now)
+                elif result["status"] != "applied":
+                    # A compensating change has no orders to reject; the stock needs fixing by hand.
+                    logger.error("Stock event %s (%s %s) was rejected: %s",
+                                 event.event_id, event.event_type, event.payload["items"], result["detail"])
+                event.published_at = now
+            OutboxEvent.objects.bulk_update(events, ["published_at"])
+
+    if error:
+        raise RelayError(error)
+    return len(events)
@@ -0,0 +1,74 @@
+import base64
+import datetime
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(created_at, order_id):
+    raw = f"{created_at.isoformat()}|{order_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return ``(created_at, id)`` from an opaque cursor; raises ``ValueError`` if malformed."""
+    try:
+        created_at, order_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        created_at = parse_datetime(created_at)
+        order_id = int(order_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+    if created_at is None:
+        raise ValueError("Invalid cursor")
+    return created_at, order_id
+
+
+def keyset_after(created_at, order_id):
+    # Rows strictly after the cursor in (-created_at, -id) order.
+    return Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=order_id)
+
+
+def parse_limit(value):
+    if value in (None, ""):
+        return DEFAULT_PAGE_SIZE
+    limit = int(value)
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def parse_moment(value):
+    """Accept an ISO datetime or a bare date (midnight UTC); raises ``ValueError``."""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid date: {value}")
+        moment = datetime.datetime.combine(day, datetime.time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, datetime.timezone.utc)
+    return moment
+
+
+DEFAULT_REPORT_DAYS = 30
+MAX_REPORT_DAYS = 366
+
+
+def parse_day_range(start, end):
+    """Inclusive ``(start, end)`` dates from query values; the last 30 days by default."""
+    end_day = parse_date(end) if end else timezone.localdate()
+    if end_day is None:
+        raise ValueError(f"Invalid date: {end}")
+    start_day = parse_date(start) if start else end_day - datetime.timedelta(days=DEFAULT_REPORT_DAYS - 1)
+    if start_day is None:
+        raise ValueError(f"Invalid date: {start}")
+    if start_day > end_day:
+        raise ValueError("start must not be after end")
+    if (end_day - start_day).days >= MAX_REPORT_DAYS:
+        raise ValueError(f"Date range is limited to {MAX_REPORT_DAYS} days")
+    return start_day, end_day
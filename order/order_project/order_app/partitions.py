@@ -0,0 +1,88 @@
+import datetime
+import re
+
+from django.db import connection, transaction
+
+from .models import Order
+
+
+TABLE = Order._meta.db_table
+PARTITION_NAME = re.compile(rf"^{TABLE}_p(\d{{4}})(\d{{2}})$")
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(day):
+    return (day.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+
+
+def partition_name(month):
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+def is_partitioned():
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND c.relnamespace = current_schema()::regnamespace",
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def monthly_tables():
+    """``{month: attached}`` for every per-month orders table, attached or left detached."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, i.inhparent IS NOT NULL FROM pg_class c "
+            "LEFT JOIN pg_inherits i ON i.inhrelid = c.oid "
+            "WHERE c.relkind = 'r' AND c.relnamespace = current_schema()::regnamespace AND c.relname LIKE %s",
+            [f"{TABLE}\\_p%"],
+        )
+        tables = {}
+        for name, attached in cursor.fetchall():
+            match = PARTITION_NAME.match(name)
+            if match:
+                tables[datetime.date(int(match[1]), int(match[2]), 1)] = attached
+        return tables
+
+
+def ensure_partitions(months_ahead, today=None):
+    """Create the partitions for this month and the next ``months_ahead``; returns the new ones.
+
+    Rows that already landed in the default partition for one of those
+    months are moved into the new partition.
+    """
+    existing = monthly_tables()
+    month = month_start(today or datetime.date.today())
+    created = []
+    for _ in range(months_ahead + 1):
+        if month not in existing:
+            create_partition(month)
+            created.append(month)
+        month = next_month(month)
+    return created
+
+
+def create_partition(month):
+    name, bounds = partition_name(month), [month, next_month(month)]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"CREATE TEMPORARY TABLE stray_orders ON COMMIT DROP AS "
+                       f"SELECT * FROM {TABLE}_default WHERE created_at >= %s AND created_at < %s", bounds)
+        cursor.execute(f"DELETE FROM {TABLE}_default WHERE created_at >= %s AND created_at < %s", bounds)
+        cursor.execute(f"CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)", bounds)
+        cursor.execute(f"INSERT INTO {name} SELECT * FROM stray_orders")
+
+
+def detach_partition(month):
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {partition_name(month)}")
+
+
+def drop_table(month):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE {partition_name(month)}")
@@ -0,0 +1,23 @@
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+_fallback = JSONEncoder()
+
+
+class ORJSONRenderer(BaseRenderer):
+    """Drop-in for DRF's ``JSONRenderer`` backed by orjson.
+
+    Datetimes, UUIDs and dicts/lists are encoded natively in the same shape
+    DRF produces (UTC as ``Z``); anything else, e.g. ``Decimal`` or lazy
+    strings, falls back to DRF's own encoder.
+    """
+    media_type = "application/json"
+    format = "json"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return orjson.dumps(data, default=_fallback.default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
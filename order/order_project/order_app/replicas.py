@@ -0,0 +1,107 @@
+import asyncio
+import contextvars
+import os
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, connections
+from service_common.writes import RecentWriters
+
+
+REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL", "5"))
+REPLICA_CHECK_TIMEOUT = float(os.getenv("READINESS_TIMEOUT", "1"))
+
+REPLICAS = [alias for alias in settings.DATABASES if alias != "default"]
+
+# Alias the router sends reads to; None (the default) means the primary.
+_read_alias = contextvars.ContextVar("read_alias", default=None)
+
+
+class ReplicaRouter:
+    """Reads go to a replica only inside ``read_from_replica``; everything else uses the primary.
+
+    Routing every read would also send the reads that precede a write
+    (e.g. the ``aget`` before a ``save``) to a replica that may lag.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary.
+        return db == "default"
+
+
+recent_writers = RecentWriters()
+# Unhealthy until the first check passes, so a missing replica never serves a read.
+healthy = dict.fromkeys(REPLICAS, False)
+_next = 0
+
+
+def pick_replica():
+    global _next
+    for _ in range(len(REPLICAS)):
+        alias = REPLICAS[_next % len(REPLICAS)]
+        _next += 1
+        if healthy[alias]:
+            return alias
+    return None
+
+
+def check_replica(alias):
+    # Also fails on an empty database, e.g. a replica file that was never seeded.
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute("SELECT 1 FROM django_migrations LIMIT 1")
+        return True
+    except DatabaseError:
+        return False
+    finally:
+        connections[alias].close()
+
+
+async def check_replicas():
+    async def check(alias):
+        try:
+            # Off the ORM thread, so a replica that hangs can't stall requests.
+            healthy[alias] = await asyncio.wait_for(
+                sync_to_async(check_replica, thread_sensitive=False)(alias), REPLICA_CHECK_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            healthy[alias] = False
+
+    await asyncio.gather(*(check(alias) for alias in REPLICAS))
+
+
+async def monitor_replicas():
+    while True:
+        await asyncio.sleep(REPLICA_CHECK_INTERVAL)
+        await check_replicas()
+
+
+async def read_from_replica(user_id, headers, load):
+    """Await ``load()`` with its reads routed to a healthy replica.
+
+    Users who wrote in the last READ_YOUR_WRITES_SECONDS, requests sent
+    with ``X-Read-Primary: 1`` and requests arriving while no replica is
+    healthy read from the primary. A replica that fails the query is
+    taken out of rotation and the query is retried on the primary.
+    """
+    alias = None
+    if headers.get("X-Read-Primary") != "1" and user_id not in recent_writers:
+        alias = pick_replica()
+    if alias is not None:
+        token = _read_alias.set(alias)
+        try:
+            return await load()
+        except DatabaseError:
+            healthy[alias] = False
+        finally:
+            _read_alias.reset(token)
+    return await load()
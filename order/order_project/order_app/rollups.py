@@ -0,0 +1,102 @@
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Order, ProductDailySales, UserDailySales
+
+
+ROLLUPS = ((ProductDailySales, "product_id"), (UserDailySales, "user_id"))
+BACKFILL_BATCH_SIZE = 1000
+
+
+def order_delta(order, sign=1):
+    """Rollup change for adding (``sign=1``) or removing (``sign=-1``) a confirmed order."""
+    return order, sign, sign * order.quantity, sign * order.total_price
+
+
+def upsert_rollup(model, key, deltas):
+    """Add ``{(key value, day): [count, quantity, revenue]}`` onto ``model`` in one statement."""
+    if not deltas:
+        return
+    table = connection.ops.quote_name(model._meta.db_table)
+    placeholders = ", ".join(["(%s, %s, %s, %s, %s)"] * len(deltas))
+    params = []
+    for (value, day), (count, quantity, revenue) in deltas.items():
+        params.extend([value, day, count, quantity, revenue])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({key}, day, order_count, quantity, revenue) VALUES {placeholders} "
+            f"ON CONFLICT ({key}, day) DO UPDATE SET "
+            f"order_count = {table}.order_count + excluded.order_count, "
+            f"quantity = {table}.quantity + excluded.quantity, "
+            f"revenue = {table}.revenue + excluded.revenue",
+            params,
+        )
+
+
+def apply_deltas(changes):
+    """Fold ``(order, count, quantity, revenue)`` changes into the daily rollups.
+
+    Must run inside the transaction that writes the orders, so the rollups
+    commit or roll back with them. Changes are merged per row first, so
+    each rollup table takes a single upsert whatever the batch size.
+    """
+    for model, key in ROLLUPS:
+        deltas = defaultdict(lambda: [0, 0, 0.0])
+        for order, count, quantity, revenue in changes:
+            totals = deltas[(getattr(order, key), timezone.localdate(order.created_at))]
+            totals[0] += count
+            totals[1] += quantity
+            totals[2] += revenue
+        upsert_rollup(model, key, {row: totals for row, totals in deltas.items() if any(totals)})
+
+
+def record_orders(orders, sign=1):
+    apply_deltas([order_delta(order, sign) for order in orders if order.status == Order.STATUS_CONFIRMED])
+
+
+def backfill(start=None, end=None):
+    """Rebuild the rollups from the orders table for days in ``[start, end]``.
+
+    On PostgreSQL the rollup tables are locked against concurrent upserts
+    for the duration, so orders written meanwhile are counted exactly once.
+    Returns the number of rollup rows written.
+    """
+    written = 0
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                for model, _ in ROLLUPS:
+                    cursor.execute(f"LOCK TABLE {connection.ops.quote_name(model._meta.db_table)} IN EXCLUSIVE MODE")
+
+        orders = Order.objects.filter(status=Order.STATUS_CONFIRMED).annotate(day=TruncDate("created_at"))
+        if start:
+            orders = orders.filter(day__gte=start)
+        if end:
+            orders = orders.filter(day__lte=end)
+
+        for model, key in ROLLUPS:
+            existing = model.objects.all()
+            if start:
+                existing = existing.filter(day__gte=start)
+            if end:
+                existing = existing.filter(day__lte=end)
+            existing.delete()
+
+            rows = (
+                orders.values(key, "day")
+                .annotate(order_count=Count("id"), quantity_sum=Sum("quantity"), revenue=Sum("total_price"))
+                .order_by()
+            )
+            batch = []
+            for row in rows.iterator(chunk_size=BACKFILL_BATCH_SIZE):
+                batch.append(model(**{key: row[key]}, day=row["day"], order_count=row["order_count"],
+                                   quantity=row["quantity_sum"], revenue=row["revenue"]))
+                if len(batch) >= BACKFILL_BATCH_SIZE:
+                    written += len(model.objects.bulk_create(batch))
+                    batch = []
+            written += len(model.objects.bulk_create(batch))
+    return written
@@ -6,10 +6,13 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         model = Order
         fields = ['product_id', 'quantity']
 
+class CheckoutSerializer(serializers.Serializer):
+    lines = OrderCreateSerializer(many=True, allow_empty=False, max_length=500)
+
 class OrderResponseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
-        fields = ['id', 'product_id', 'quantity', 'total_price', 'created_at', 'updated_at']
+        fields = ['id', 'product_id', 'quantity', 'total_price', 'checkout_id', 'status', 'created_at', 'updated_at']
         
         
 class OrderUpdateSerializer(serializers.ModelSerializer):
@@ -1,3 +1,349 @@
-from django.test import TestCase
+import datetime
+import json
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+import httpx
+from asgiref.sync import async_to_sync
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from service_common.writes import RecentWriters
+
+from . import archive, replicas
+from . import views
+from .models import Order, OutboxEvent, ProductDailySales, UserDailySales
+from .outbox import RelayError, enqueue_orders, relay_batch
+
+
+PRICES = {1: 2.5, 2: 4.0}
+
+
+def product_service(status="applied", status_code=200):
+    """httpx client whose /stock-events answers every event with ``status``."""
+    received = []
+
+    def handler(request):
+        events = json.loads(request.content)["events"]
+        received.extend(events)
+        if status_code != 200:
+            return httpx.Response(status_code)
+        return httpx.Response(200, json=[
+            {
+                "event_id": event["event_id"],
+                "status": status,
+                "detail": None if status == "applied" else "Insufficient stock",
+                "items": [
+                    {"id": item["product_id"], "price": PRICES[item["product_id"]], "stock": 0}
+                    for item in event["items"]
+                ] if status == "applied" else [],
+            }
+            for event in events
+        ])
+
+    client = httpx.Client(base_url="http://product/products", transport=httpx.MockTransport(handler))
+    return client, received
+
+
+def place_orders(user_id=7):
+    items = [{"product_id": 1, "quantity": 2}, {"product_id": 2, "quantity": 1}]
+    orders = [
+        Order(product_id=item["product_id"], quantity=item["quantity"], total_price=0, user_id=user_id,
+              status=Order.STATUS_PENDING)
+        for item in items
+    ]
+    return enqueue_orders(orders, items)
+
+
+class OutboxRelayTests(TestCase):
+    def test_orders_and_event_are_written_together(self):
+        orders = place_orders()
+
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.payload["order_ids"], [order.id for order in orders])
+        self.assertIsNone(event.published_at)
+        self.assertEqual(Order.objects.filter(status=Order.STATUS_PENDING).count(), 2)
+
+    def test_applied_event_confirms_and_prices_the_orders(self):
+        orders = place_orders()
+        client, received = product_service("applied")
+
+        self.assertEqual(relay_batch(client), 1)
+
+        totals = dict(Order.objects.filter(status=Order.STATUS_CONFIRMED).values_list("id", "total_price"))
+        self.assertEqual(totals, {orders[0].id: 5.0, orders[1].id: 4.0})
+        self.assertIsNotNone(OutboxEvent.objects.get().published_at)
+        self.assertEqual(ProductDailySales.objects.get(product_id=1).quantity, 2)
+
+        # Delivered events are not sent again.
+        self.assertEqual(relay_batch(client), 0)
+        self.assertEqual(len(received), 1)
+
+    def test_rejected_event_rejects_the_orders(self):
+        place_orders()
+        client, _ = product_service("rejected")
+
+        relay_batch(client)
+
+        self.assertEqual(Order.objects.filter(status=Order.STATUS_REJECTED).count(), 2)
+        self.assertFalse(ProductDailySales.objects.exists())
+
+    def test_failed_delivery_is_retried_with_the_same_event_id(self):
+        place_orders()
+        client, first_attempt = product_service(status_code=503)
+
+        with self.assertRaises(RelayError):
+            relay_batch(client)
+
+        event = OutboxEvent.objects.get()
+        self.assertIsNone(event.published_at)
+        self.assertEqual(event.attempts, 1)
+        self.assertIn("503", event.last_error)
+        self.assertEqual(Order.objects.filter(status=Order.STATUS_PENDING).count(), 2)
+
+        # The product service applies an event id at most once, so resending it is safe.
+        client, second_attempt = product_service("applied")
+        self.assertEqual(relay_batch(client), 1)
+        self.assertEqual(first_attempt[0]["event_id"], second_attempt[0]["event_id"])
+        self.assertEqual(Order.objects.filter(status=Order.STATUS_CONFIRMED).count(), 2)
+
+
+def signed_in(user_id):
+    """Skip token checks in the views; requests act as ``user_id``."""
+    return mock.patch.object(views, "authenticate", return_value={"user_id": user_id})
+
+
+def create_order(user_id=7, product_id=1, quantity=1, total_price=2.5, created_at=None, **fields):
+    order = Order.objects.create(
+        user_id=user_id, product_id=product_id, quantity=quantity, total_price=total_price, **fields,
+    )
+    if created_at is not None:
+        Order.objects.filter(id=order.id).update(created_at=created_at)
+        order.refresh_from_db()
+    return order
+
+
+class OrderListTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.orders = [
+            create_order(product_id=product_id, created_at=now - datetime.timedelta(hours=hours))
+            for product_id, hours in ((1, 3), (2, 2), (1, 1))
+        ]
+        create_order(user_id=8)
+        patch = signed_in(7)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def list_orders(self, **params):
+        response = self.client.get("/orders", params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def ids(self, page):
+        return [order["id"] for order in page["results"]]
+
+    def test_pages_follow_the_cursor_newest_first(self):
+        first = self.list_orders(limit=2)
+        self.assertEqual(self.ids(first), [self.orders[2].id, self.orders[1].id])
+
+        second = self.list_orders(limit=2, cursor=first["next_cursor"])
+        self.assertEqual(self.ids(second), [self.orders[0].id])
+        self.assertIsNone(second["next_cursor"])
+
+    def test_filters_narrow_the_page(self):
+        self.assertEqual(self.ids(self.list_orders(product_id=1)), [self.orders[2].id, self.orders[0].id])
+        created_after = (self.orders[1].created_at - datetime.timedelta(seconds=1)).isoformat()
+        self.assertEqual(self.ids(self.list_orders(created_after=created_after)),
+                         [self.orders[2].id, self.orders[1].id])
+
+    def test_invalid_cursor_is_rejected(self):
+        self.assertEqual(self.client.get("/orders", {"cursor": "not-a-cursor"}).status_code, 400)
+
+
+class OrderEtagTests(TestCase):
+    def setUp(self):
+        self.order = create_order()
+        patch = signed_in(7)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_order_revalidates_until_it_changes(self):
+        etag = self.client.get(f"/orders/{self.order.id}").headers["ETag"]
+
+        response = self.client.get(f"/orders/{self.order.id}", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], etag)
+
+        Order.objects.filter(id=self.order.id).update(quantity=3, updated_at=timezone.now())
+        response = self.client.get(f"/orders/{self.order.id}", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_list_page_revalidates_until_a_row_is_added(self):
+        etag = self.client.get("/orders").headers["ETag"]
+        self.assertEqual(self.client.get("/orders", headers={"If-None-Match": etag}).status_code, 304)
+
+        create_order()
+        self.assertEqual(self.client.get("/orders", headers={"If-None-Match": etag}).status_code, 200)
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        for patch in (signed_in(7), mock.patch.object(views.product_client, "request", self.reserve)):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    async def reserve(self, method, path, **kwargs):
+        return httpx.Response(200, json={"id": 1, "price": 2.5, "stock": 100})
+
+    def totals(self):
+        rollups = [ProductDailySales.objects.get(product_id=1), UserDailySales.objects.get(user_id=7)]
+        return [(row.order_count, row.quantity, row.revenue) for row in rollups]
+
+    def test_rollups_follow_create_update_and_delete(self):
+        order = self.client.post("/orders", {"product_id": 1, "quantity": 2}, content_type="application/json").json()
+        self.assertEqual(self.totals(), [(1, 2, 5.0)] * 2)
+
+        response = self.client.put(f"/orders/{order['id']}", {"quantity": 5}, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.totals(), [(1, 5, 12.5)] * 2)
+
+        report = self.client.get("/orders/reports/me").json()
+        self.assertEqual(report["totals"], {"order_count": 1, "quantity": 5, "revenue": 12.5})
+
+        self.assertEqual(self.client.delete(f"/orders/{order['id']}").status_code, 200)
+        self.assertEqual(self.totals(), [(0, 0, 0.0)] * 2)
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patch = mock.patch.object(archive, "ORDER_ARCHIVE_DIR", directory.name)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+        self.month = datetime.date(2023, 3, 1)
+        moment = timezone.make_aware(datetime.datetime(2023, 3, 15, 12))
+        self.order = create_order(created_at=moment, quantity=4, total_price=10)
+        self.recent = create_order()
+
+    def test_rows_of_the_month_move_to_the_archive(self):
+        self.assertEqual(archive.archive_rows(self.month), 1)
+
+        self.assertFalse(Order.objects.filter(id=self.order.id).exists())
+        self.assertTrue(Order.objects.filter(id=self.recent.id).exists())
+        entry = archive.read_manifest()["months"]["2023-03"]
+        self.assertEqual((entry["rows"], entry["min_id"], entry["max_id"]), (1, self.order.id, self.order.id))
+        # Archiving the month again keeps what is already there.
+        self.assertEqual(archive.archive_rows(self.month), 0)
+        self.assertEqual(archive.read_manifest()["months"]["2023-03"]["rows"], 1)
+
+    def test_archived_order_is_served_read_only(self):
+        archive.archive_rows(self.month)
+
+        with signed_in(7):
+            response = self.client.get(f"/orders/{self.order.id}")
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertTrue(body["archived"])
+        self.assertEqual((body["id"], body["quantity"], body["total_price"]), (self.order.id, 4, 10))
+        self.assertNotIn("user_id", body)
+
+        # Other users and unknown ids still get a 404.
+        with signed_in(8):
+            self.assertEqual(self.client.get(f"/orders/{self.order.id}").status_code, 404)
+        with signed_in(7):
+            self.assertEqual(self.client.get(f"/orders/{self.recent.id + 100}").status_code, 404)
+
+
+class StockCompensationTests(TestCase):
+    items = [{"product_id": 1, "quantity": 2}]
+
+    def compensate(self, action="release"):
+        async_to_sync(views.compensate_stock)(action, self.items, {})
+
+    def test_undo_is_queued_and_relayed(self):
+        self.compensate()
+
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.event_type, OutboxEvent.TYPE_STOCK_RELEASE)
+        self.assertEqual(event.payload, {"items": self.items})
+
+        client, received = product_service("applied")
+        self.assertEqual(relay_batch(client), 1)
+        self.assertEqual(received[0]["type"], "stock.release")
+        self.assertFalse(Order.objects.exists())
+
+    def test_rejected_undo_is_logged(self):
+        self.compensate("reserve")
+        client, _ = product_service("rejected")
+
+        with self.assertLogs("order_app.outbox", "ERROR"):
+            self.assertEqual(relay_batch(client), 1)
+        self.assertIsNotNone(OutboxEvent.objects.get().published_at)
+
+    @mock.patch.object(views, "enqueue_stock_change", side_effect=DatabaseError("database is down"))
+    def test_undo_is_sent_directly_when_the_outbox_is_down(self, enqueue):
+        request = mock.AsyncMock(return_value=httpx.Response(200, request=httpx.Request("POST", "http://product")))
+        with mock.patch.object(views.product_client, "request", request), self.assertLogs("order_app.views", "WARNING"):
+            self.compensate()
+        request.assert_awaited_once_with("POST", "/release", headers={}, json={"items": self.items})
+
+    @mock.patch.object(views, "enqueue_stock_change", side_effect=DatabaseError("database is down"))
+    def test_lost_undo_is_logged(self, enqueue):
+        request = mock.AsyncMock(side_effect=httpx.ConnectError("refused"))
+        with mock.patch.object(views.product_client, "request", request), self.assertLogs("order_app.views") as logs:
+            self.compensate()
+        self.assertIn("must be corrected by hand", logs.output[-1])
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        self.router = replicas.ReplicaRouter()
+        patches = [
+            mock.patch.object(replicas, "REPLICAS", ["replica1"]),
+            mock.patch.dict(replicas.healthy, {"replica1": True}),
+            mock.patch.object(replicas, "recent_writers", RecentWriters(window=60)),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    async def read_alias(self, user_id=1, headers=None):
+        async def load():
+            return self.router.db_for_read(Order)
+        return await replicas.read_from_replica(user_id, headers or {}, load)
+
+    async def test_reads_go_to_a_healthy_replica(self):
+        self.assertEqual(await self.read_alias(), "replica1")
+        # Only reads inside read_from_replica are routed.
+        self.assertIsNone(self.router.db_for_read(Order))
+        self.assertEqual(self.router.db_for_write(Order), "default")
+
+    async def test_recent_writers_read_from_the_primary(self):
+        replicas.recent_writers.record(1)
+        self.assertIsNone(await self.read_alias(user_id=1))
+        self.assertEqual(await self.read_alias(user_id=2), "replica1")
+
+    async def test_read_primary_header_skips_the_replica(self):
+        self.assertIsNone(await self.read_alias(headers={"X-Read-Primary": "1"}))
+
+    async def test_unhealthy_replica_is_skipped(self):
+        replicas.healthy["replica1"] = False
+        self.assertIsNone(await self.read_alias())
+
+    async def test_failed_replica_query_is_retried_on_the_primary(self):
+        aliases = []
+
+        async def load():
+            alias = self.router.db_for_read(Order)
+            aliases.append(alias)
+            if alias is not None:
+                raise DatabaseError("replica went away")
+            return "primary"
+
+        self.assertEqual(await replicas.read_from_replica(1, {}, load), "primary")
+        self.assertEqual(aliases, ["replica1", None])
+        self.assertFalse(replicas.healthy["replica1"])
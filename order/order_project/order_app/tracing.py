@@ -0,0 +1,62 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from service_common.tracing import MAX_STATEMENT_LENGTH, current_span, set_default_service_name, start_span
+
+
+set_default_service_name("order")
+
+
+def trace_query(execute, sql, params, many, context):
+    parent = current_span.get()
+    if parent is None or not parent.sampled:
+        return execute(sql, params, many, context)
+    attributes = {"db.system": context["connection"].vendor, "db.statement": sql[:MAX_STATEMENT_LENGTH]}
+    with start_span("SQL", "client", attributes):
+        return execute(sql, params, many, context)
+
+
+def install_query_tracer(sender, connection, **kwargs):
+    """``connection_created`` receiver; Django keeps one connection per thread."""
+    if trace_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(trace_query)
+
+
+class TracingMiddleware:
+    """Opens a server span per request, continuing an incoming ``traceparent``.
+
+    The trace id is returned in a ``traceresponse`` header so a client can
+    look up the trace of a slow call.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with self.server_span(request) as span:
+            response = self.get_response(request)
+            return self.finish(request, response, span)
+
+    async def __acall__(self, request):
+        with self.server_span(request) as span:
+            response = await self.get_response(request)
+            return self.finish(request, response, span)
+
+    def server_span(self, request):
+        attributes = {"http.method": request.method, "http.target": request.path}
+        return start_span(f"{request.method} {request.path}", "server", attributes, request.headers.get("traceparent"))
+
+    def finish(self, request, response, span):
+        if request.resolver_match:
+            span.name = f"{request.method} /{request.resolver_match.route}"
+        span.attributes["http.status_code"] = response.status_code
+        if response.status_code >= 500:
+            span.status = "error"
+        response["traceresponse"] = span.traceparent
+        return response
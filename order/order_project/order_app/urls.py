@@ -1,7 +1,19 @@
 from django.urls import path
-from .views import OrderListCreateView, OrderDetailView
+from .views import (
+    OrderListCreateView, OrderDetailView, CheckoutView,
+    BestSellersReportView, ProductSalesReportView, MySalesReportView,
+)
+from .metrics import metrics_view
+from .health import healthz, readyz
 
 urlpatterns = [
     path('orders', OrderListCreateView.as_view(), name='order-list-create'),
+    path('orders/checkout', CheckoutView.as_view(), name='order-checkout'),
     path('orders/<int:order_id>', OrderDetailView.as_view(), name='order-detail'),
+    path('orders/reports/best-sellers', BestSellersReportView.as_view(), name='report-best-sellers'),
+    path('orders/reports/products/<int:product_id>', ProductSalesReportView.as_view(), name='report-product-sales'),
+    path('orders/reports/me', MySalesReportView.as_view(), name='report-my-sales'),
+    path('metrics', metrics_view, name='metrics'),
+    path('healthz', healthz, name='healthz'),
+    path('readyz', readyz, name='readyz'),
 ]
\ No newline at end of file
@@ -1,31 +1,202 @@
+import logging
 import os
-import requests
-
+import uuid
+import jwt
+import httpx
+
+from asgiref.sync import sync_to_async
+from django.db import DatabaseError, transaction
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
 from rest_framework import status
-from rest_framework.views import APIView
+from adrf.views import APIView
 from rest_framework.response import Response
-from .models import Order
-from .serializers import OrderCreateSerializer, OrderResponseSerializer, OrderUpdateSerializer
+from service_common.auth import SERVICE_AUTH_SECRET, verify_token, trusted_identity
+from .models import Order, OutboxEvent, ProductDailySales, UserDailySales
+from .serializers import OrderCreateSerializer, OrderResponseSerializer, OrderUpdateSerializer, CheckoutSerializer
+from service_common.client import ServiceClient, CircuitOpenError
+from .pagination import encode_cursor, decode_cursor, keyset_after, parse_limit, parse_moment, parse_day_range
+from .outbox import enqueue_orders, enqueue_stock_change
+from .metrics import stock_compensations
+from .rollups import apply_deltas, record_orders
+from .etags import order_etag, page_etag, etag_matches, not_modified
+from .archive import find_archived_order
+from .replicas import read_from_replica, recent_writers
+
 
+logger = logging.getLogger(__name__)
 
-AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL")
 PRODUCT_SERVICE_URL = os.getenv("PRODUCT_SERVICE_URL")
+# "sync" reserves stock with the product service before answering; "outbox"
+# writes the order as pending and leaves the reservation to relay_outbox.
+ORDER_STOCK_MODE = os.getenv("ORDER_STOCK_MODE", "sync")
+
+# One keep-alive pool per process, shared by all in-flight requests.
+product_client = ServiceClient("product", PRODUCT_SERVICE_URL)
 
 def validate_token(auth_header):
     if not auth_header:
         raise Exception("Authorization header is missing")
-    response = requests.post(f"{AUTH_SERVICE_URL}", headers={"Authorization": auth_header})
-    if response.status_code != 200:
-        raise Exception(response.json().get("detail"))
-    return response.json()
+    if not auth_header.startswith("Bearer "):
+        raise Exception("Authorization header missing or invalid")
+    try:
+        return verify_token(auth_header.split(" ")[1])
+    except jwt.ExpiredSignatureError:
+        raise Exception("Token has expired")
+    except jwt.InvalidTokenError:
+        raise Exception("Invalid token")
+
+
+def authenticate(request):
+    return trusted_identity(request.headers) or validate_token(request.headers.get("Authorization"))
+
+
+def stock_headers(user):
+    # The stock endpoints are internal-only: they trust this service's secret, never the caller's token.
+    return {"X-Service-Auth": SERVICE_AUTH_SECRET or "", "X-User-Id": str(user.get("user_id"))}
+
+
+def stock_error_response(response):
+    if response.status_code == 200:
+        return None
+    if response.status_code == 404:
+        return Response({"detail": response.json().get("detail")}, status=status.HTTP_404_NOT_FOUND)
+    if response.status_code == 409:
+        return Response({"detail": response.json().get("detail")}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({"detail": "Failed to update product stock"}, status=response.status_code)
+
+
+COMPENSATION_EVENTS = {"reserve": OutboxEvent.TYPE_STOCK_RESERVE, "release": OutboxEvent.TYPE_STOCK_RELEASE}
+
+
+async def compensate_stock(action, items, headers):
+    """Undo a stock change ("release" a reservation, "reserve" a release) whose order rows could not be written.
+
+    The undo is queued in the outbox, so the relay retries it until the
+    product service has applied it exactly once. Only if the outbox can't
+    be written either is it sent directly, once.
+    """
+    try:
+        await sync_to_async(enqueue_stock_change)(COMPENSATION_EVENTS[action], items)
+    except DatabaseError:
+        logger.warning("Could not queue stock %s of %s, sending it directly", action, items, exc_info=True)
+    else:
+        stock_compensations.inc(action, "queued")
+        return
+
+    try:
+        response = await product_client.request("POST", f"/{action}", headers=headers, json={"items": items})
+        response.raise_for_status()
+    except (CircuitOpenError, httpx.HTTPError):
+        stock_compensations.inc(action, "failed")
+        logger.error("Stock %s of %s was lost and must be corrected by hand", action, items, exc_info=True)
+        return
+    stock_compensations.inc(action, "sent")
+
+
+@sync_to_async
+def create_orders(orders):
+    with transaction.atomic():
+        orders = Order.objects.bulk_create(orders)
+        record_orders(orders)
+    recent_writers.record(orders[0].user_id)
+    return orders
+
+
+@sync_to_async
+def save_quantity_change(order, old_quantity, old_total_price):
+    """Write the new quantity unless the order changed since ``old_quantity`` was read.
+
+    Returns False, writing nothing, when a concurrent update or delete got
+    there first; the stock change made for this request must then be undone.
+    """
+    order.updated_at = timezone.now()
+    with transaction.atomic():
+        updated = Order.objects.filter(id=order.id, quantity=old_quantity, status=order.status).update(
+            quantity=order.quantity, total_price=order.total_price, updated_at=order.updated_at,
+        )
+        if not updated:
+            return False
+        if order.status == Order.STATUS_CONFIRMED:
+            apply_deltas([(order, 0, order.quantity - old_quantity, order.total_price - old_total_price)])
+    recent_writers.record(order.user_id)
+    return True
+
+
+@sync_to_async
+def delete_order(order):
+    with transaction.atomic():
+        order.delete()
+        record_orders([order], sign=-1)
+    recent_writers.record(order.user_id)
+
+
+def not_modifiable_response(order):
+    if order.status == Order.STATUS_PENDING:
+        return Response({"detail": "Order is still pending"}, status=status.HTTP_409_CONFLICT)
+    if order.status == Order.STATUS_REJECTED:
+        return Response({"detail": "Order was rejected"}, status=status.HTTP_409_CONFLICT)
+    return None
 
 
 class OrderListCreateView(APIView):
-    def post(self, request):
-        auth_header = request.headers.get("Authorization")
-        
+    async def get(self, request):
+        try:
+            user = authenticate(request)
+        except Exception as e:
+            return Response({"detail": str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+
+        params = request.query_params
+        try:
+            limit = parse_limit(params.get("limit"))
+            cursor = decode_cursor(params["cursor"]) if params.get("cursor") else None
+            created_after = parse_moment(params["created_after"]) if params.get("created_after") else None
+            created_before = parse_moment(params["created_before"]) if params.get("created_before") else None
+            product_id = int(params["product_id"]) if params.get("product_id") else None
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Served by order_user_created_idx (user_id, -created_at, -id)
+        orders = Order.objects.filter(user_id=user.get("user_id")).order_by("-created_at", "-id")
+        if cursor:
+            orders = orders.filter(keyset_after(*cursor))
+        if created_after:
+            orders = orders.filter(created_at__gte=created_after)
+        if created_before:
+            orders = orders.filter(created_at__lt=created_before)
+        if product_id is not None:
+            orders = orders.filter(product_id=product_id)
+
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match is not None:
+            # Revalidation only aggregates the page window; nothing is serialized.
+            window = await orders[:limit + 1].aaggregate(
+                count=Count("id"), last_updated=Max("updated_at"), id_sum=Sum("id"),
+            )
+            etag = page_etag(window["count"], window["last_updated"], window["id_sum"])
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+
+        fields = OrderResponseSerializer.Meta.fields
+        results = [row async for row in orders.values(*fields)[:limit + 1]]
+        etag = page_etag(
+            len(results),
+            max((row["updated_at"] for row in results), default=None),
+            sum(row["id"] for row in results),
+        )
+
+        next_cursor = None
+        if len(results) > limit:
+            results = results[:limit]
+            next_cursor = encode_cursor(results[-1]["created_at"], results[-1]["id"])
+
+        return Response(
+            {"results": results, "next_cursor": next_cursor}, status=status.HTTP_200_OK, headers={"ETag": etag},
+        )
+
+    async def post(self, request):
         try:
-            user = validate_token(auth_header)
+            user = authenticate(request)
         except Exception as e:
             return Response({"detail": str(e)}, status=status.HTTP_401_UNAUTHORIZED)
 
@@ -33,69 +204,54 @@ class OrderListCreateView(APIView):
         if serializer.is_valid():
             product_id = serializer.validated_data.get("product_id")
             quantity = serializer.validated_data.get("quantity")  
+
+            if ORDER_STOCK_MODE == "outbox":
+                # Price and stock are settled when the product service applies the event.
+                order = Order(
+                    product_id=product_id,
+                    quantity=quantity,
+                    user_id=user.get("user_id"),
+                    total_price=0,
+                    status=Order.STATUS_PENDING,
+                )
+                orders = await sync_to_async(enqueue_orders)(
+                    [order], [{"product_id": product_id, "quantity": quantity}],
+                )
+                return Response(OrderResponseSerializer(orders[0]).data, status=status.HTTP_202_ACCEPTED)
             
-            # Check if product exists in product_microservice
-            product_microservice_url = f"{PRODUCT_SERVICE_URL}/{product_id}"
-            headers = {"Authorization": auth_header}
+            # Reserve stock atomically in product_microservice
+            headers = stock_headers(user)
 
             try:
-                product_response = requests.get(product_microservice_url, headers=headers)
-                
-                if product_response.status_code == 404:
-                    return Response({"detail": "Product not found"}, status=status.HTTP_404_NOT_FOUND)
-                elif product_response.status_code != 200:
-                    return Response({"detail": "Error verifying product"}, status=product_response.status_code)
-
-                product_data = product_response.json()
-                product_stock = product_data.get("stock")
-                product_price = product_data.get("price")
-                
-                if quantity > product_stock:
-                    return Response(
-                        {"detail": f"Insufficient stock. Available: {product_stock}"},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-
-                total_price = product_price * quantity
-                print(f"Product Price: {product_price}")
-                print(f"Quantity: {quantity}")
-                print(f"Total Price: {total_price}")
-
-                # Update product stock by calling the product microservice
-                updated_stock = product_stock - quantity
-                update_product_data = {
-                    "name": product_data["name"],
-                    "price": product_price,
-                    "stock": updated_stock
-                }
-
-                update_product_url = f"{PRODUCT_SERVICE_URL}/{product_id}"
-                update_product_response = requests.put(
-                    update_product_url, 
-                    headers=headers, 
-                    json=update_product_data
+                reserve_response = await product_client.request(
+                    "POST",
+                    f"/{product_id}/reserve",
+                    headers=headers,
+                    json={"quantity": quantity}
                 )
-                
-                if update_product_response.status_code != 200:
-                    return Response(
-                        {"detail": "Failed to update product stock"},
-                        status=update_product_response.status_code
-                    )
-
-            except requests.RequestException:
+            except (CircuitOpenError, httpx.HTTPError):
                 return Response(
                     {"detail": "Failed to connect to product service"},
                     status=status.HTTP_503_SERVICE_UNAVAILABLE
                 )
 
-            # Proceed to create the order with the calculated total price
-            order = Order.objects.create(
-                product_id=serializer.validated_data['product_id'],
-                quantity=serializer.validated_data['quantity'],
-                user_id=user.get("user_id"),
-                total_price=total_price
-            )
+            error = stock_error_response(reserve_response)
+            if error:
+                return error
 
+            total_price = reserve_response.json()["price"] * quantity
+
+            # Proceed to create the order with the calculated total price
+            try:
+                [order] = await create_orders([Order(
+                    product_id=product_id,
+                    quantity=quantity,
+                    user_id=user.get("user_id"),
+                    total_price=total_price
+                )])
+            except Exception:
+                await compensate_stock("release", [{"product_id": product_id, "quantity": quantity}], headers)
+                raise
 
             response_serializer = OrderResponseSerializer(order)
             return Response(response_serializer.data, status=status.HTTP_201_CREATED)
@@ -105,111 +261,276 @@ class OrderListCreateView(APIView):
 
 
 class OrderDetailView(APIView):
-    def get(self, request, order_id):
-        auth_header = request.headers.get("Authorization")
+    async def get(self, request, order_id):
         try:
-            user = validate_token(auth_header)
+            user = authenticate(request)
         except Exception as e:
             return Response({"detail": str(e)}, status=status.HTTP_401_UNAUTHORIZED)
 
         try:
-            order = Order.objects.get(id=order_id, user_id=user.get("user_id"))
+            order = await read_from_replica(
+                user.get("user_id"), request.headers,
+                lambda: Order.objects.aget(id=order_id, user_id=user.get("user_id")),
+            )
         except Order.DoesNotExist:
-            return Response({"detail": "Order not found"}, status=status.HTTP_404_NOT_FOUND)
+            # Orders past the retention window only exist in the archive files; they are read-only.
+            archived = await sync_to_async(find_archived_order)(order_id, user.get("user_id"))
+            if archived is None:
+                return Response({"detail": "Order not found"}, status=status.HTTP_404_NOT_FOUND)
+            archived.pop("user_id")
+            return Response({**archived, "archived": True}, status=status.HTTP_200_OK)
+
+        etag = order_etag(order)
+        if etag_matches(request.headers.get("If-None-Match"), etag):
+            return not_modified(etag)
 
         serializer = OrderResponseSerializer(order)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(serializer.data, status=status.HTTP_200_OK, headers={"ETag": etag})
 
-    def put(self, request, order_id):
-        auth_header = request.headers.get("Authorization")
+    async def put(self, request, order_id):
         try:
-            user = validate_token(auth_header)
+            user = authenticate(request)
         except Exception as e:
             return Response({"detail": str(e)}, status=status.HTTP_401_UNAUTHORIZED)
 
         try:
-            order = Order.objects.get(id=order_id, user_id=user.get("user_id"))
+            order = await Order.objects.aget(id=order_id, user_id=user.get("user_id"))
         except Order.DoesNotExist:
             return Response({"detail": "Order not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        # Fetch product details from the product microservice
-        product_microservice_url = f"{PRODUCT_SERVICE_URL}/{order.product_id}"
-        headers = {"Authorization": auth_header}
+        error = not_modifiable_response(order)
+        if error:
+            return error
 
-        try:
-            product_response = requests.get(product_microservice_url, headers=headers)
-            if product_response.status_code != 200:
-                return Response({"detail": "Failed to fetch product details"}, status=product_response.status_code)
+        if not request.data.get("quantity"):
+            return Response({"detail": "Quantity is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-            product_data = product_response.json()
-            product_stock = product_data.get("stock")
-        except requests.RequestException:
-            return Response(
-                {"detail": "Failed to connect to product service"},
-                status=status.HTTP_503_SERVICE_UNAVAILABLE
-            )
+        serializer = OrderUpdateSerializer(order, data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        new_quantity = serializer.validated_data["quantity"]
 
-        # Calculate the stock adjustment
-        old_quantity = order.quantity
-        new_quantity = request.data.get("quantity")
-        if not new_quantity:
-            return Response({"detail": "Quantity is required"}, status=status.HTTP_400_BAD_REQUEST)
+        old_quantity, old_total_price = order.quantity, order.total_price
 
-        new_quantity = int(new_quantity)
-        quantity_diff = new_quantity - old_quantity
+        # Adjust stock in the product microservice by the difference only
+        headers = stock_headers(user)
+        quantity_diff = new_quantity - order.quantity
+        action = "reserve" if quantity_diff > 0 else "release"
 
-        # Ensure stock adjustment is valid
-        if quantity_diff > 0 and quantity_diff > product_stock:
+        if quantity_diff:
+            try:
+                stock_response = await product_client.request(
+                    "POST",
+                    f"/{order.product_id}/{action}",
+                    headers=headers,
+                    json={"quantity": abs(quantity_diff)}
+                )
+            except (CircuitOpenError, httpx.HTTPError):
+                return Response(
+                    {"detail": "Failed to connect to product service"},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
+
+            error = stock_error_response(stock_response)
+            if error:
+                return error
+            order.total_price = stock_response.json()["price"] * new_quantity
+
+        # Update the order with the new quantity, undoing the stock change if that fails
+        undo_action = "release" if quantity_diff > 0 else "reserve"
+        undo_items = [{"product_id": order.product_id, "quantity": abs(quantity_diff)}]
+        order.quantity = new_quantity
+        try:
+            saved = await save_quantity_change(order, old_quantity, old_total_price)
+        except Exception:
+            if quantity_diff:
+                await compensate_stock(undo_action, undo_items, headers)
+            raise
+        if not saved:
+            if quantity_diff:
+                await compensate_stock(undo_action, undo_items, headers)
             return Response(
-                {"detail": f"Insufficient stock. Available: {product_stock}"},
-                status=status.HTTP_400_BAD_REQUEST
+                {"detail": "Order was changed by another request; fetch it and retry"},
+                status=status.HTTP_409_CONFLICT,
             )
+        response_serializer = OrderResponseSerializer(order)
+        return Response(response_serializer.data, status=status.HTTP_200_OK, headers={"ETag": order_etag(order)})
 
-        # Update product stock in the product microservice
-        updated_stock = product_stock - quantity_diff
-        update_product_data = {
-            "name": product_data["name"],
-            "price": product_data["price"],
-            "stock": updated_stock
-        }
+    async def delete(self, request, order_id):
+        try:
+            user = authenticate(request)
+        except Exception as e:
+            return Response({"detail": str(e)}, status=status.HTTP_401_UNAUTHORIZED)
 
         try:
-            update_product_response = requests.put(
-                product_microservice_url,
-                headers=headers,
-                json=update_product_data
-            )
-            if update_product_response.status_code != 200:
-                return Response(
-                    {"detail": "Failed to update product stock"},
-                    status=update_product_response.status_code
+            order = await Order.objects.aget(id=order_id, user_id=user.get("user_id"))
+        except Order.DoesNotExist:
+            return Response({"detail": "Order not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        if order.status == Order.STATUS_PENDING:
+            return Response({"detail": "Order is still pending"}, status=status.HTTP_409_CONFLICT)
+
+        await delete_order(order)
+        return Response({"message": "Order deleted successfully"}, status=status.HTTP_200_OK)
+
+
+
+class CheckoutView(APIView):
+    async def post(self, request):
+        try:
+            user = authenticate(request)
+        except Exception as e:
+            return Response({"detail": str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+
+        serializer = CheckoutSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        lines = serializer.validated_data["lines"]
+        items = [{"product_id": line["product_id"], "quantity": line["quantity"]} for line in lines]
+        headers = stock_headers(user)
+
+        if ORDER_STOCK_MODE == "outbox":
+            checkout_id = uuid.uuid4()
+            orders = [
+                Order(
+                    product_id=line["product_id"],
+                    quantity=line["quantity"],
+                    user_id=user.get("user_id"),
+                    total_price=0,
+                    checkout_id=checkout_id,
+                    status=Order.STATUS_PENDING,
                 )
-        except requests.RequestException:
+                for line in lines
+            ]
+            orders = await sync_to_async(enqueue_orders)(orders, items)
+            response_serializer = OrderResponseSerializer(orders, many=True)
+            return Response(
+                {
+                    "checkout_id": str(checkout_id),
+                    "status": Order.STATUS_PENDING,
+                    "total_price": None,
+                    "orders": response_serializer.data,
+                },
+                status=status.HTTP_202_ACCEPTED
+            )
+
+        # Reserve stock for every line in one all-or-nothing call
+        try:
+            reserve_response = await product_client.request("POST", "/reserve", headers=headers, json={"items": items})
+        except (CircuitOpenError, httpx.HTTPError):
             return Response(
                 {"detail": "Failed to connect to product service"},
                 status=status.HTTP_503_SERVICE_UNAVAILABLE
             )
 
-        # Update the order with the new quantity
-        serializer = OrderUpdateSerializer(order, data=request.data)
-        if serializer.is_valid():
-            serializer.save()
-            response_serializer = OrderResponseSerializer(order)
-            return Response(response_serializer.data, status=status.HTTP_200_OK)
+        error = stock_error_response(reserve_response)
+        if error:
+            return error
 
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        prices = {row["id"]: row["price"] for row in reserve_response.json()}
+        checkout_id = uuid.uuid4()
+        orders = [
+            Order(
+                product_id=line["product_id"],
+                quantity=line["quantity"],
+                user_id=user.get("user_id"),
+                total_price=prices[line["product_id"]] * line["quantity"],
+                checkout_id=checkout_id,
+            )
+            for line in lines
+        ]
 
-    def delete(self, request, order_id):
-        auth_header = request.headers.get("Authorization")
         try:
-            user = validate_token(auth_header)
+            orders = await create_orders(orders)
+        except Exception:
+            await compensate_stock("release", items, headers)
+            raise
+
+        response_serializer = OrderResponseSerializer(orders, many=True)
+        return Response(
+            {
+                "checkout_id": str(checkout_id),
+                "status": Order.STATUS_CONFIRMED,
+                "total_price": sum(order.total_price for order in orders),
+                "orders": response_serializer.data,
+            },
+            status=status.HTTP_201_CREATED
+        )
+
+
+
+ROLLUP_FIELDS = ("order_count", "quantity", "revenue")
+MAX_BEST_SELLERS = 100
+
+
+async def daily_report(rollups, start, end):
+    # Served entirely from the rollup tables; the orders table is never scanned.
+    rollups = rollups.filter(day__gte=start, day__lte=end)
+    days = [row async for row in rollups.order_by("day").values("day", *ROLLUP_FIELDS)]
+    totals = {field: sum(row[field] for row in days) for field in ROLLUP_FIELDS}
+    return {"start": start, "end": end, "days": days, "totals": totals}
+
+
+class BestSellersReportView(APIView):
+    async def get(self, request):
+        try:
+            authenticate(request)
         except Exception as e:
             return Response({"detail": str(e)}, status=status.HTTP_401_UNAUTHORIZED)
 
+        params = request.query_params
+        order_by = params.get("order_by", "quantity")
         try:
-            order = Order.objects.get(id=order_id, user_id=user.get("user_id"))
-        except Order.DoesNotExist:
-            return Response({"detail": "Order not found"}, status=status.HTTP_404_NOT_FOUND)
+            start, end = parse_day_range(params.get("start"), params.get("end"))
+            limit = min(parse_limit(params.get("limit") or "10"), MAX_BEST_SELLERS)
+            if order_by not in ROLLUP_FIELDS:
+                raise ValueError(f"order_by must be one of {', '.join(ROLLUP_FIELDS)}")
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Annotations can't reuse the column names, so sum into totals and rename.
+        rows = (
+            ProductDailySales.objects.filter(day__gte=start, day__lte=end)
+            .values("product_id")
+            .annotate(**{f"total_{field}": Sum(field) for field in ROLLUP_FIELDS})
+            .filter(total_order_count__gt=0)
+            .order_by(f"-total_{order_by}", "product_id")[:limit]
+        )
+        results = [
+            {"product_id": row["product_id"], **{field: row[f"total_{field}"] for field in ROLLUP_FIELDS}}
+            async for row in rows
+        ]
+        return Response({"start": start, "end": end, "results": results}, status=status.HTTP_200_OK)
+
+
+class ProductSalesReportView(APIView):
+    async def get(self, request, product_id):
+        try:
+            authenticate(request)
+        except Exception as e:
+            return Response({"detail": str(e)}, status=status.HTTP_401_UNAUTHORIZED)
 
-        order.delete()
-        return Response({"message": "Order deleted successfully"}, status=status.HTTP_200_OK)
+        try:
+            start, end = parse_day_range(request.query_params.get("start"), request.query_params.get("end"))
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        report = await daily_report(ProductDailySales.objects.filter(product_id=product_id), start, end)
+        return Response({"product_id": product_id, **report}, status=status.HTTP_200_OK)
+
+
+class MySalesReportView(APIView):
+    async def get(self, request):
+        try:
+            user = authenticate(request)
+        except Exception as e:
+            return Response({"detail": str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            start, end = parse_day_range(request.query_params.get("start"), request.query_params.get("end"))
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        report = await daily_report(UserDailySales.objects.filter(user_id=user.get("user_id")), start, end)
+        return Response(report, status=status.HTTP_200_OK)
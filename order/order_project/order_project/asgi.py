@@ -13,4 +13,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'order_project.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from order_app.health import lifespan  # noqa: E402  needs the settings configured above
+
+
+async def application(scope, receive, send):
+    # Django's handler only speaks HTTP; answer the lifespan protocol here so
+    # the worker warms up before uvicorn starts accepting connections.
+    if scope["type"] == "lifespan":
+        await lifespan(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
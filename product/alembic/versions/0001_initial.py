@@ -0,0 +1,57 @@
+"""Initial product schema.
+
+Databases created by the old create_all startup already have these tables:
+add the products.version column if missing, then run `alembic stamp 0001`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    is_postgresql = op.get_bind().dialect.name == "postgresql"
+    if is_postgresql:
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.create_table(
+        "products",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String()),
+        sa.Column("price", sa.Float()),
+        sa.Column("stock", sa.Integer()),
+        sa.Column("user_id", sa.Integer()),
+        sa.Column("version", sa.Integer(), nullable=False, server_default="1"),
+    )
+    op.create_index("ix_products_id", "products", ["id"])
+    op.create_index("ix_products_name", "products", ["name"])
+    op.create_index("ix_products_user_id", "products", ["user_id"])
+    if is_postgresql:
+        op.create_index(
+            "ix_products_name_trgm", "products", ["name"],
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"},
+        )
+
+    op.create_table(
+        "applied_stock_events",
+        sa.Column("event_id", sa.String(36), primary_key=True),
+        sa.Column("result", sa.JSON(), nullable=False),
+        sa.Column("applied_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("applied_stock_events")
+    op.drop_index("ix_products_name_trgm", table_name="products", if_exists=True)
+    op.drop_index("ix_products_user_id", table_name="products")
+    op.drop_index("ix_products_name", table_name="products")
+    op.drop_index("ix_products_id", table_name="products")
+    op.drop_table("products")
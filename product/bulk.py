@@ -0,0 +1,77 @@
+import csv
+import io
+import json
+
+
+def detect_format(content_type: str, requested: str = None) -> str:
+    if requested:
+        return requested
+    if content_type and "csv" in content_type:
+        return "csv"
+    return "ndjson"
+
+
+async def iter_lines(chunks):
+    """Split a byte stream into lines of bytes without reading it all into memory.
+
+    Lines are decoded by the caller, so a malformed line can be reported on
+    its own. A newline byte never occurs inside a multi-byte UTF-8 sequence.
+    """
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r")
+    if pending:
+        yield pending.rstrip(b"\r")
+
+
+def decode_line(line: bytes) -> str:
+    try:
+        return line.decode("utf-8")
+    except UnicodeDecodeError as exc:
+        raise ValueError(f"invalid UTF-8 at byte {exc.start}") from None
+
+
+async def iter_records(chunks, fmt: str):
+    """Yield ``(line_number, record_or_error)`` for every non-blank line.
+
+    CSV uploads need a header row; quoted fields may not span lines. A
+    line that is not valid UTF-8 is reported as an error for that line.
+    """
+    header = None
+    line_number = 0
+    async for raw in iter_lines(chunks):
+        line_number += 1
+        if not raw.strip():
+            continue
+        try:
+            line = decode_line(raw)
+            if fmt == "csv":
+                values = next(csv.reader([line]))
+                if header is None:
+                    header = [name.strip() for name in values]
+                    continue
+                if len(values) != len(header):
+                    raise ValueError(f"expected {len(header)} columns, got {len(values)}")
+                record = dict(zip(header, values))
+            else:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("expected a JSON object")
+        except ValueError as exc:
+            yield line_number, exc
+        else:
+            yield line_number, record
+
+
+def encode_rows(rows, fmt: str, columns: list, header: bool = False) -> str:
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        if header:
+            writer.writerow(columns)
+        writer.writerows([row[column] for column in columns] for row in rows)
+        return buffer.getvalue()
+    return "".join(json.dumps(dict(row)) + "\n" for row in rows)
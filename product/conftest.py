@@ -0,0 +1,87 @@
+import itertools
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+
+# The service reads its configuration at import time, so the environment is
+# set up before product_service is imported by the tests.
+WORKDIR = tempfile.mkdtemp(prefix="product-tests-")
+PRIMARY = os.path.join(WORKDIR, "primary.db")
+REPLICA = os.path.join(WORKDIR, "replica.db")
+INTERNAL_SECRET = "test-internal"
+SERVICE_SECRET = "test-service"
+
+os.environ.update({
+    "DATABASE_URL": f"sqlite+aiosqlite:///{PRIMARY}",
+    "REPLICA_DATABASE_URLS": f"sqlite+aiosqlite:///{REPLICA}",
+    "REPLICA_CHECK_INTERVAL": "3600",
+    "READ_YOUR_WRITES_SECONDS": "60",
+    "INTERNAL_AUTH_SECRET": INTERNAL_SECRET,
+    "SERVICE_AUTH_SECRET": SERVICE_SECRET,
+    "SECRET_KEY": "test-secret",
+    "ALGORITHM": "HS256",
+})
+
+for path in (PRIMARY, REPLICA):
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=dict(os.environ, DATABASE_URL=f"sqlite+aiosqlite:///{path}"),
+        check=True, capture_output=True,
+    )
+
+
+def user_headers(user_id: int) -> dict:
+    """Identity as forwarded by the gateway."""
+    return {"X-Internal-Auth": INTERNAL_SECRET, "X-User-Id": str(user_id)}
+
+
+@pytest.fixture
+def as_user():
+    return user_headers
+
+
+_user_ids = itertools.count(1000)
+
+
+@pytest.fixture
+def new_user():
+    """Id of a user who owns no products yet, so a ``user_id`` filter sees only this test's rows."""
+    return next(_user_ids)
+
+
+@pytest.fixture
+def internal():
+    """Headers of the order service calling the stock endpoints."""
+    return {"X-Service-Auth": SERVICE_SECRET}
+
+
+@pytest.fixture
+def sync_replica():
+    """Bring the replica up to date with the primary, as replication would."""
+    def sync():
+        with sqlite3.connect(PRIMARY) as source, sqlite3.connect(REPLICA) as target:
+            source.backup(target)
+    return sync
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from product_service import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def product(client):
+    """A fresh product with 10 units in stock, created by user 1."""
+    response = client.post("/products", json={"name": "Widget", "price": 2.5, "stock": 10}, headers=user_headers(1))
+    assert response.status_code == 200
+    return response.json()
@@ -1,18 +1,32 @@
+import asyncio
 import os
 
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from contextlib import asynccontextmanager
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import text
+from sqlalchemy.exc import InterfaceError, OperationalError
+from service_common.engines import instrument_engine, trace_engine
+from service_common.metrics import event_loop_monitor
+from service_common.writes import RecentWriters
+from replicas import ReplicaSet
 
 
 
 DATABASE_URL = os.getenv('DATABASE_URL')  
+POOL_WARM_CONNECTIONS = int(os.getenv('POOL_WARM_CONNECTIONS', '5'))
+READINESS_TIMEOUT = float(os.getenv('READINESS_TIMEOUT', '1'))
+# Comma-separated read replicas for get_product and list_products; empty reads from DATABASE_URL.
+REPLICA_DATABASE_URLS = os.getenv('REPLICA_DATABASE_URLS', '')
+REPLICA_CHECK_INTERVAL = float(os.getenv('REPLICA_CHECK_INTERVAL', '5'))
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
 
 
 Base = declarative_base()
 engine = create_async_engine(DATABASE_URL)
+instrument_engine(engine)
+trace_engine(engine)
 
 AsyncSessionLocal = sessionmaker(
     bind=engine,
@@ -22,17 +36,91 @@ AsyncSessionLocal = sessionmaker(
     autoflush=False,
 )
 
-async def get_db():
+# The probe also fails on an empty database, e.g. a replica file that was never seeded.
+replicas = ReplicaSet(REPLICA_DATABASE_URLS, "SELECT version_num FROM product_alembic_version",
+                      REPLICA_CHECK_INTERVAL, READINESS_TIMEOUT)
+for replica in replicas.replicas:
+    instrument_engine(replica.engine)
+    trace_engine(replica.engine)
+recent_writers = RecentWriters()
+
+
+async def get_db(request: Request):
     async with AsyncSessionLocal() as session:
         try:
             yield session
         finally:
             await session.close()
+    if request.method not in READ_METHODS:
+        # Set by validate_token; the writer's reads stay on the primary for a while.
+        recent_writers.record(getattr(request.state, "user_id", None))
+
+
+class ReadRoute:
+    """Where one read-only request reads: ``replica``, or the primary when it is None.
+
+    ``run`` retries once on the primary when the replica's connection
+    fails, after taking the replica out of rotation, so a replica outage
+    costs no failed requests.
+    """
+
+    def __init__(self, replica=None, read_your_writes: bool = False):
+        self.replica = replica
+        self.read_your_writes = read_your_writes
+
+    async def run(self, load):
+        """Await ``load(session)`` and return its result."""
+        if self.replica is not None:
+            try:
+                async with AsyncSessionLocal(bind=self.replica.engine) as session:
+                    return await load(session)
+            except (OperationalError, InterfaceError):
+                replicas.mark_down(self.replica)
+                self.replica = None
+        async with AsyncSessionLocal() as session:
+            return await load(session)
+
+
+def read_route(user_id=None, read_primary: bool = False) -> ReadRoute:
+    """Route for a read-only request: a healthy replica when there is one.
+
+    Users who wrote recently, and requests that ask for it, read from the
+    primary; ``read_your_writes`` tells them apart from a plain fallback.
+    """
+    read_your_writes = bool(replicas.replicas) and (read_primary or user_id in recent_writers)
+    return ReadRoute(None if read_your_writes else replicas.pick(), read_your_writes)
+
+
+async def warm_pool(connections: int = POOL_WARM_CONNECTIONS):
+    """Open ``connections`` pooled connections up front so first requests skip the connect."""
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(ping() for _ in range(connections)))
+
+
+async def database_ready(timeout: float = READINESS_TIMEOUT) -> bool:
+    try:
+        async with asyncio.timeout(timeout):
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        return True
+    except Exception:
+        return False
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    yield
+    # The schema is managed by `alembic upgrade head`, run once before the replicas start.
+    app.state.ready = False
+    await warm_pool()
+    await replicas.check()
+    app.state.ready = True
+    monitor = asyncio.create_task(replicas.monitor())
+    async with event_loop_monitor():
+        yield
+    app.state.ready = False
+    monitor.cancel()
+    await replicas.dispose()
     await engine.dispose()
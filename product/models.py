@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, Integer, String, Float, Index, JSON, DateTime
 from database import Base
 
 class Product(Base):
@@ -7,4 +9,27 @@ class Product(Base):
     name = Column(String, index=True)
     price = Column(Float)
     stock = Column(Integer)
-    user_id = Column(Integer)
\ No newline at end of file
+    user_id = Column(Integer, index=True)
+    # Bumped by every write; clients send it back in If-Match for optimistic concurrency.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    __table_args__ = (
+        # Trigram GIN index for prefix and fuzzy name search (needs the pg_trgm extension).
+        Index(
+            "ix_products_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
+class AppliedStockEvent(Base):
+    """Stock events already applied, keyed by the producer's event id.
+
+    The stored result is replayed on redelivery, so a consumer retry never
+    moves stock twice.
+    """
+    __tablename__ = "applied_stock_events"
+    event_id = Column(String(36), primary_key=True)
+    result = Column(JSON, nullable=False)
+    applied_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
@@ -1,129 +1,648 @@
-from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi import FastAPI, HTTPException, Depends, Request, Query, Header, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.future import select
-import httpx
+from sqlalchemy import update, insert, delete, func, case
+from typing import Optional
+import hashlib
+import jwt
 import os
 from dotenv import load_dotenv
 from database import *
 from models import *
 from schemas import *
+from service_common.auth import verify_token, trusted_identity, is_service_request
+from cache import product_cache
+from search import search_index, escape_like
+from bulk import detect_format, iter_records, encode_rows
+from responses import DefaultJSONResponse, list_response
+from service_common.asgi import MetricsMiddleware, TracingMiddleware, metrics_response
+from service_common.tracing import set_default_service_name
 
 load_dotenv()
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=DefaultJSONResponse)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+set_default_service_name("product")
 
 
-AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL")  
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "500"))
+PRODUCT_FIELDS = list(ProductResponse.model_fields)
+MAX_SEARCH_PAGE_SIZE = 100
+MAX_SEARCH_OFFSET = 1000
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+MAX_REPORTED_ERRORS = 1000
 
 
 async def validate_token(request: Request):
-    auth_header = request.headers.get("Authorization")
-    if not auth_header:
-        raise HTTPException(status_code=401, detail="Authorization header is missing")
+    identity = trusted_identity(request.headers)
+    if not identity:
+        auth_header = request.headers.get("Authorization")
+        if not auth_header:
+            raise HTTPException(status_code=401, detail="Authorization header is missing")
+        if not auth_header.startswith("Bearer "):
+            raise HTTPException(status_code=401, detail="Authorization header missing or invalid")
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(f"{AUTH_SERVICE_URL}", headers={"Authorization": auth_header})
-        if response.status_code != 200:
-            raise HTTPException(status_code=response.status_code, detail=response.json().get("detail"))
-        return response.json()  # Token payload
+        try:
+            identity = verify_token(auth_header.split(" ")[1])  # Token payload
+        except jwt.ExpiredSignatureError:
+            raise HTTPException(status_code=401, detail="Token has expired")
+        except jwt.InvalidTokenError:
+            raise HTTPException(status_code=401, detail="Invalid token")
 
+    # get_db keeps the caller's reads on the primary for a while after a write.
+    request.state.user_id = identity.get("user_id")
+    return identity
 
 
+async def get_read_route(request: Request, user: dict = Depends(validate_token)) -> ReadRoute:
+    return read_route(user.get("user_id"), request.headers.get("X-Read-Primary") == "1")
+
+
+
+
+def product_etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def parse_if_match(value: Optional[str]):
+    """Versions named by an If-Match header: None if absent, "*" for any version."""
+    if value is None:
+        return None
+    if value.strip() == "*":
+        return "*"
+    versions = set()
+    for tag in value.split(","):
+        tag = tag.strip()
+        # Weak tags never satisfy If-Match (RFC 9110 13.1.1).
+        if tag.startswith("W/"):
+            continue
+        try:
+            versions.add(int(tag.strip('"')))
+        except ValueError:
+            continue
+    return versions
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against ``etag`` (RFC 9110 13.1.2)."""
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def page_etag(count: int, max_id: int, id_sum: int, version_sum: int) -> str:
+    """ETag of a list page, from the ids and versions of the rows in its window.
+
+    Every write bumps a row's version, and rows entering or leaving the
+    window change the id aggregates, so any change to the page changes it.
+    """
+    digest = hashlib.blake2b(f"{count}:{max_id}:{id_sum}:{version_sum}".encode(), digest_size=8)
+    return f'"p{digest.hexdigest()}"'
+
+
+async def write_product(db: AsyncSession, statement, product_id: int, if_match: Optional[str]):
+    """Run one UPDATE/DELETE ... RETURNING for ``product_id``, guarded by If-Match.
+
+    Only a statement that matched no row costs a second query, to tell a
+    missing product (404) from a stale version (412).
+    """
+    versions = parse_if_match(if_match)
+    statement = statement.where(Product.id == product_id)
+    if versions not in (None, "*"):
+        statement = statement.where(Product.version.in_(versions))
+
+    async with db.begin():
+        row = (await db.execute(statement)).mappings().first()
+        if row is None and versions is not None:
+            exists = (await db.execute(select(Product.id).filter(Product.id == product_id))).first()
+            if exists:
+                raise HTTPException(status_code=412, detail="Product was modified; fetch it again")
+    if row is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return dict(row)
+
 
 @app.post("/products", response_model=ProductResponse)
 async def create_product(
     product: ProductCreate, 
+    response: Response,
     db: AsyncSession = Depends(get_db), 
     user: dict = Depends(validate_token)):
     
 
     user_id = user.get("user_id")
 
-    
-    db_product = Product(
-        name=product.name,
-        price=product.price,
-        stock=product.stock,
-        user_id=user_id
+    # INSERT ... RETURNING hands back the generated id and version without a refresh.
+    statement = (
+        insert(Product)
+        .values(name=product.name, price=product.price, stock=product.stock, user_id=user_id)
+        .returning(*[getattr(Product, column) for column in PRODUCT_FIELDS])
     )
-    
-    db.add(db_product)
-    await db.commit()
-    await db.refresh(db_product)
+    async with db.begin():
+        db_product = dict((await db.execute(statement)).mappings().one())
+
+    search_index.add(db_product["id"], db_product["name"])
+    response.headers["ETag"] = product_etag(db_product["version"])
     return db_product
 
 
 
+@app.get("/products/search", response_model=ProductSearchPage)
+async def search_products(
+    q: str = Query(min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_PAGE_SIZE),
+    offset: int = Query(0, ge=0, le=MAX_SEARCH_OFFSET),
+    db: AsyncSession = Depends(get_db),
+    user: dict = Depends(validate_token)):
+
+    columns = [getattr(Product, column) for column in PRODUCT_FIELDS]
+
+    if engine.dialect.name == "postgresql":
+        # Name prefix, then word prefix, then pg_trgm similarity; every predicate uses ix_products_name_trgm.
+        pattern = escape_like(q)
+        name_prefix = Product.name.ilike(pattern + "%", escape="\\")
+        word_prefix = Product.name.ilike("% " + pattern + "%", escape="\\")
+        score = func.similarity(Product.name, q)
+        rank = case((name_prefix, 0), (word_prefix, 1), else_=2)
+        query = (
+            select(*columns, score.label("score"))
+            .where(name_prefix | word_prefix | Product.name.op("%")(q))
+            .order_by(rank, score.desc(), Product.id)
+            .offset(offset)
+            .limit(limit + 1)
+        )
+        async with db.begin():
+            rows = (await db.execute(query)).all()
+        keys = PRODUCT_FIELDS + ["score"]
+        items = [dict(zip(keys, row)) for row in rows]
+    else:
+        if not search_index.built:
+            async with db.begin():
+                search_index.build((await db.execute(select(Product.id, Product.name))).all())
+        ranked = search_index.search(q)[offset:offset + limit + 1]
+        async with db.begin():
+            result = await db.execute(select(*columns).where(Product.id.in_([match[0] for match in ranked])))
+            rows = {row[0]: dict(zip(PRODUCT_FIELDS, row)) for row in result.all()}
+        items = [{**rows[product_id], "score": score} for product_id, _, score in ranked if product_id in rows]
+
+    next_offset = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_offset = offset + limit
+
+    return list_response({"items": items, "next_offset": next_offset})
+
+
+
+@app.post("/products/import", response_model=ImportResult)
+async def import_products(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$"),
+    db: AsyncSession = Depends(get_db),
+    user: dict = Depends(validate_token)):
+
+    fmt = detect_format(request.headers.get("content-type"), format)
+    user_id = user.get("user_id")
+    inserted = 0
+    error_count = 0
+    errors = []
+    batch = []
+
+    async def flush():
+        # One executemany INSERT per batch, each in its own short transaction.
+        async with db.begin():
+            await db.execute(insert(Product), batch)
+        batch.clear()
+
+    async for line_number, record in iter_records(request.stream(), fmt):
+        if not isinstance(record, Exception):
+            try:
+                product = ProductCreate(**record)
+            except ValidationError as exc:
+                record = ValueError("; ".join(
+                    f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+                ))
+            else:
+                batch.append({**product.model_dump(), "user_id": user_id})
+
+        if isinstance(record, Exception):
+            error_count += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"line": line_number, "error": str(record)})
+
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            inserted += len(batch)
+            await flush()
+
+    if batch:
+        inserted += len(batch)
+        await flush()
+
+    if inserted:
+        search_index.reset()
+    return {"inserted": inserted, "failed": error_count, "errors": errors}
+
+
+
+@app.get("/products/export")
+async def export_products(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    user: dict = Depends(validate_token)):
+
+    async def generate():
+        # The request-scoped session is closed before the body streams, so use a dedicated one.
+        async with AsyncSessionLocal() as session:
+            query = select(*[getattr(Product, column) for column in PRODUCT_FIELDS]).order_by(Product.id)
+            result = await session.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+            header = True
+            async for rows in result.mappings().partitions():
+                yield encode_rows(rows, format, PRODUCT_FIELDS, header=header)
+                header = False
+            if header and format == "csv":
+                yield encode_rows([], format, PRODUCT_FIELDS, header=True)
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(generate(), media_type=media_type)
+
+
+
 @app.get("/products/{product_id}", response_model=ProductResponse)
 async def get_product(
     product_id: int, 
-    db: AsyncSession = Depends(get_db), 
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    route: ReadRoute = Depends(get_read_route), 
     user: dict = Depends(validate_token)):
     
     
-    async with db.begin():
-        result = await db.execute(select(Product).filter(Product.id == product_id))
-        product = result.scalars().first()
+    async def load_product(db: AsyncSession):
+        async with db.begin():
+            result = await db.execute(
+                select(*[getattr(Product, column) for column in PRODUCT_FIELDS]).filter(Product.id == product_id)
+            )
+            row = result.mappings().first()
+        return dict(row) if row else None
+
+    # The cache is only filled from the primary: a row read from a lagging
+    # replica could otherwise outlive the write that replaced it.
+    if route.read_your_writes:
+        # Another process's cache may still hold the row from before this user's write.
+        product = await route.run(load_product)
+    elif route.replica is None:
+        product = await product_cache.get_or_load(product_id, lambda: route.run(load_product))
+    else:
+        product = product_cache.get(product_id) or await route.run(load_product)
 
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    
+
+    etag = product_etag(product["version"])
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
     return product
 
 
 
-@app.get("/products", response_model=list[ProductResponse])
-async def list_products(db: AsyncSession = Depends(get_db), user: dict = Depends(validate_token)):
-    async with db.begin():
-        result = await db.execute(select(Product))
-        products = result.scalars().all()
-    return products
+@app.get("/products", response_model=ProductPage)
+async def list_products(
+    response: Response,
+    cursor: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    in_stock: Optional[bool] = None,
+    user_id: Optional[int] = None,
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    route: ReadRoute = Depends(get_read_route),
+    user: dict = Depends(validate_token)):
 
+    columns = PRODUCT_FIELDS
+    if fields:
+        requested = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = set(requested) - set(PRODUCT_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        # id is always returned, it is the page cursor
+        columns = ["id"] + [field for field in PRODUCT_FIELDS if field in requested and field != "id"]
+
+    filters = []
+    if cursor is not None:
+        filters.append(Product.id > cursor)
+    if min_price is not None:
+        filters.append(Product.price >= min_price)
+    if max_price is not None:
+        filters.append(Product.price <= max_price)
+    if in_stock is True:
+        filters.append(Product.stock > 0)
+    elif in_stock is False:
+        filters.append(Product.stock <= 0)
+    if user_id is not None:
+        filters.append(Product.user_id == user_id)
+
+    if if_none_match is not None:
+        # Revalidation only aggregates the ids and versions of the page window.
+        window = (
+            select(Product.id, Product.version).where(*filters).order_by(Product.id).limit(limit + 1).subquery()
+        )
+        fingerprint = select(
+            func.count(),
+            func.coalesce(func.max(window.c.id), 0),
+            func.coalesce(func.sum(window.c.id), 0),
+            func.coalesce(func.sum(window.c.version), 0),
+        )
+        async def load_fingerprint(db: AsyncSession):
+            async with db.begin():
+                return (await db.execute(fingerprint)).one()
+
+        etag = page_etag(*await route.run(load_fingerprint))
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+    # Keyset pagination on the primary key; selecting plain columns skips ORM object construction.
+    selected = columns if "version" in columns else columns + ["version"]
+    query = (
+        select(*[getattr(Product, column) for column in selected])
+        .where(*filters)
+        .order_by(Product.id)
+        .limit(limit + 1)
+    )
+
+    async def load_rows(db: AsyncSession):
+        async with db.begin():
+            return (await db.execute(query)).all()
+
+    rows = await route.run(load_rows)
+
+    # Rows are plain tuples in ``selected`` order; id comes first.
+    version = selected.index("version")
+    etag = page_etag(
+        len(rows),
+        max((row[0] for row in rows), default=0),
+        sum(row[0] for row in rows),
+        sum(row[version] for row in rows),
+    )
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1][0]
+
+    # zip stops at ``columns``, dropping the version when it was only selected for the ETag.
+    items = [dict(zip(columns, row)) for row in rows]
+    response.headers["ETag"] = etag
+    return list_response({"items": items, "next_cursor": next_cursor}, {"ETag": etag})
+
+
+
+async def modify_product(db: AsyncSession, product_id: int, values: dict, if_match: Optional[str], response: Response):
+    statement = (
+        update(Product)
+        .values(**values, version=Product.version + 1)
+        .returning(*[getattr(Product, column) for column in PRODUCT_FIELDS])
+    )
+    db_product = await write_product(db, statement, product_id, if_match)
+    product_cache.invalidate(product_id)
+    search_index.add(product_id, db_product["name"])
+    response.headers["ETag"] = product_etag(db_product["version"])
+    return db_product
 
 
 @app.put("/products/{product_id}", response_model=ProductResponse)
 async def update_product(
     product_id: int, 
     product: ProductCreate, 
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db), 
     user: dict = Depends(validate_token)):
     
  
     user_id = user.get("user_id")
 
-    async with db.begin():
-        result = await db.execute(select(Product).filter(Product.id == product_id))
-        db_product = result.scalars().first()
-
-    if not db_product:
-        raise HTTPException(status_code=404, detail="Product not found")
-
     # if db_product.user_id != user_id:
     #     raise HTTPException(status_code=403, detail="Not authorized to update this product")
 
-    db_product.name = product.name
-    db_product.price = product.price
-    db_product.stock = product.stock
-    await db.commit()
-    await db.refresh(db_product)
+    return await modify_product(db, product_id, product.model_dump(), if_match, response)
 
-    return db_product
+
+
+@app.patch("/products/{product_id}", response_model=ProductResponse)
+async def patch_product(
+    product_id: int,
+    product: ProductUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+    user: dict = Depends(validate_token)):
+
+    values = product.model_dump(exclude_unset=True, exclude_none=True)
+    if not values:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    return await modify_product(db, product_id, values, if_match, response)
 
 
 
 @app.delete("/products/{product_id}")
 async def delete_product(
     product_id: int, 
+    if_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db), 
     user: dict = Depends(validate_token)):
     
+    await write_product(db, delete(Product).returning(Product.id), product_id, if_match)
+    product_cache.invalidate(product_id)
+    search_index.remove(product_id)
+    return {"message": "Product deleted successfully"}
+
+
+
+async def apply_stock_deltas(db: AsyncSession, deltas: dict[int, int]) -> list[dict]:
+    """Run the conditional stock UPDATEs inside the caller's transaction.
+
+    Each product is a single conditional UPDATE, so concurrent reservations
+    can never drive stock negative. Raises 404/409 on the first product that
+    is missing or short; the caller's transaction must then be rolled back.
+    """
+    rows = []
+    # Fixed lock order keeps overlapping batches from deadlocking.
+    for product_id in sorted(deltas):
+        delta = deltas[product_id]
+        statement = (
+            update(Product)
+            .where(Product.id == product_id)
+            .values(stock=Product.stock + delta, version=Product.version + 1)
+            .returning(Product.id, Product.price, Product.stock)
+        )
+        if delta < 0:
+            statement = statement.where(Product.stock >= -delta)
+
+        row = (await db.execute(statement)).first()
+        if row is None:
+            result = await db.execute(select(Product.stock).filter(Product.id == product_id))
+            available = result.scalar()
+            if available is None:
+                raise HTTPException(status_code=404, detail=f"Product {product_id} not found")
+            raise HTTPException(status_code=409, detail=f"Insufficient stock for product {product_id}. Available: {available}")
+        rows.append({"id": row.id, "price": row.price, "stock": row.stock})
+    return rows
+
+
+async def change_stock(db: AsyncSession, deltas: dict[int, int]):
+    """Apply stock deltas all-or-nothing in one transaction."""
     async with db.begin():
-        result = await db.execute(select(Product).filter(Product.id == product_id))
-        db_product = result.scalars().first()
+        rows = await apply_stock_deltas(db, deltas)
 
-    if not db_product:
-        raise HTTPException(status_code=404, detail="Product not found")
+    for product_id in deltas:
+        product_cache.invalidate(product_id)
+    return rows
 
-    await db.delete(db_product)
-    await db.commit()
-    return {"message": "Product deleted successfully"}
+
+def merge_stock_items(items: list[StockItem], sign: int) -> dict[int, int]:
+    deltas = {}
+    for item in items:
+        deltas[item.product_id] = deltas.get(item.product_id, 0) + sign * item.quantity
+    return deltas
+
+
+
+def require_internal(request: Request):
+    # Stock is only changed on behalf of orders, by the order service. Gateway
+    # traffic carries X-Internal-Auth but never X-Service-Auth, whatever the path.
+    if not is_service_request(request.headers):
+        raise HTTPException(status_code=403, detail="Internal endpoint")
+
+
+
+@app.post("/products/reserve", response_model=list[StockReservation])
+async def reserve_stock_bulk(
+    batch: StockBatch,
+    db: AsyncSession = Depends(get_db),
+    internal: None = Depends(require_internal)):
+
+    return await change_stock(db, merge_stock_items(batch.items, -1))
+
+
+
+@app.post("/products/release", response_model=list[StockReservation])
+async def release_stock_bulk(
+    batch: StockBatch,
+    db: AsyncSession = Depends(get_db),
+    internal: None = Depends(require_internal)):
+
+    return await change_stock(db, merge_stock_items(batch.items, 1))
+
+
+
+async def apply_stock_event(db: AsyncSession, event: StockEvent) -> dict:
+    """Apply one event exactly once; redeliveries get the stored result back.
+
+    The applied-event row and the stock updates commit together. A rejected
+    event (missing product, insufficient stock) is recorded too, so a retry
+    gets the same answer instead of a second attempt at the stock.
+    """
+    event_id = str(event.event_id)
+    sign = -1 if event.type == "stock.reserve" else 1
+    deltas = merge_stock_items(event.items, sign)
+    try:
+        async with db.begin():
+            stored = await db.get(AppliedStockEvent, event_id)
+            if stored is not None:
+                return stored.result
+            applied = AppliedStockEvent(event_id=event_id, result={})
+            db.add(applied)
+            # A concurrent delivery of the same event fails here on the primary key.
+            await db.flush()
+            rows = await apply_stock_deltas(db, deltas)
+            applied.result = {"event_id": event_id, "status": "applied", "detail": None, "items": rows}
+    except HTTPException as exc:
+        result = {"event_id": event_id, "status": "rejected", "detail": exc.detail, "items": []}
+        try:
+            async with db.begin():
+                db.add(AppliedStockEvent(event_id=event_id, result=result))
+        except IntegrityError:
+            return await stored_stock_event(db, event_id)
+        return result
+    except IntegrityError:
+        return await stored_stock_event(db, event_id)
+
+    for product_id in deltas:
+        product_cache.invalidate(product_id)
+    return applied.result
+
+
+async def stored_stock_event(db: AsyncSession, event_id: str) -> dict:
+    async with db.begin():
+        return (await db.get(AppliedStockEvent, event_id, populate_existing=True)).result
+
+
+@app.post("/products/stock-events", response_model=list[StockEventResult])
+async def consume_stock_events(
+    batch: StockEventBatch,
+    db: AsyncSession = Depends(get_db),
+    internal: None = Depends(require_internal)):
+    """Outbox consumer for the order service; events are applied in order, each in its own transaction."""
+    return [await apply_stock_event(db, event) for event in batch.events]
+
+
+
+@app.post("/products/{product_id}/reserve", response_model=StockReservation)
+async def reserve_stock(
+    product_id: int,
+    change: StockChange,
+    db: AsyncSession = Depends(get_db),
+    internal: None = Depends(require_internal)):
+
+    return (await change_stock(db, {product_id: -change.quantity}))[0]
+
+
+
+@app.post("/products/{product_id}/release", response_model=StockReservation)
+async def release_stock(
+    product_id: int,
+    change: StockChange,
+    db: AsyncSession = Depends(get_db),
+    internal: None = Depends(require_internal)):
+
+    return (await change_stock(db, {product_id: change.quantity}))[0]
+
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return product_cache.stats()
+
+
+@app.get("/replicas/stats")
+async def replica_stats():
+    return {**replicas.stats(), "read_your_writes_users": len(recent_writers)}
+
+
+@app.get("/metrics")
+async def metrics():
+    return metrics_response()
+
+
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz(request: Request):
+    if not getattr(request.app.state, "ready", False) or not await database_ready():
+        raise HTTPException(status_code=503, detail="Not ready")
+    return {"status": "ready"}
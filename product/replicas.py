@@ -0,0 +1,80 @@
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+
+class Replica:
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.engine = create_async_engine(url)
+        # Unhealthy until the first check passes, so a missing replica never serves a read.
+        self.healthy = False
+        self.reads = 0
+        self.failures = 0
+
+
+class ReplicaSet:
+    """Read-only engines used round-robin while they pass health checks.
+
+    ``probe`` is run against every replica each ``interval`` seconds; one
+    that errors or takes longer than ``timeout`` is skipped until it passes
+    again. With no healthy replica, ``pick`` returns None and reads go to
+    the primary.
+    """
+
+    def __init__(self, urls: str, probe: str, interval: float, timeout: float):
+        self.replicas = [
+            Replica(f"replica{index}", url.strip())
+            for index, url in enumerate((urls or "").split(","), start=1) if url.strip()
+        ]
+        self.probe = text(probe)
+        self.interval = interval
+        self.timeout = timeout
+        self.primary_reads = 0
+        self._next = 0
+
+    def pick(self):
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[self._next % len(self.replicas)]
+            self._next += 1
+            if replica.healthy:
+                replica.reads += 1
+                return replica
+        self.primary_reads += 1
+        return None
+
+    def mark_down(self, replica: Replica):
+        replica.healthy = False
+        replica.failures += 1
+
+    async def check(self):
+        async def check_one(replica):
+            try:
+                async with asyncio.timeout(self.timeout):
+                    async with replica.engine.connect() as conn:
+                        await conn.execute(self.probe)
+                replica.healthy = True
+            except Exception:
+                if replica.healthy:
+                    self.mark_down(replica)
+
+        await asyncio.gather(*(check_one(replica) for replica in self.replicas))
+
+    async def monitor(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.check()
+
+    async def dispose(self):
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def stats(self) -> dict:
+        return {
+            "primary_reads": self.primary_reads,
+            "replicas": {
+                replica.name: {"healthy": replica.healthy, "reads": replica.reads, "failures": replica.failures}
+                for replica in self.replicas
+            },
+        }
@@ -0,0 +1,23 @@
+import os
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+
+# "orjson" renders every response with orjson, and lets list endpoints hand
+# their rows straight to the encoder instead of validating them against the
+# response model first.
+JSON_RENDERER = os.getenv('JSON_RENDERER', 'stdlib')
+FAST_JSON = JSON_RENDERER == 'orjson'
+
+DefaultJSONResponse = ORJSONResponse if FAST_JSON else JSONResponse
+
+
+def list_response(content: dict, headers: dict = None):
+    """Return ``content`` as-is on the fast path, bypassing ``response_model``.
+
+    Only for payloads built from plain column values that already match the
+    response model. Otherwise the dict goes through FastAPI's usual validation.
+    """
+    if FAST_JSON:
+        return ORJSONResponse(content, headers=headers)
+    return content
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import Any, Literal, Optional
+from uuid import UUID
 
 class ProductCreate(BaseModel):
     name: str
@@ -6,8 +8,76 @@ class ProductCreate(BaseModel):
     stock: int
 
 
+class ProductUpdate(BaseModel):
+    name: Optional[str] = None
+    price: Optional[float] = None
+    stock: Optional[int] = None
+
+
 class ProductResponse(BaseModel):
     id: int
     name: str
     price: float
     stock: int
+    version: int
+
+
+class ProductPage(BaseModel):
+    items: list[dict[str, Any]]
+    next_cursor: Optional[int] = None
+
+
+class ProductSearchResult(ProductResponse):
+    score: float
+
+
+class ProductSearchPage(BaseModel):
+    items: list[ProductSearchResult]
+    next_offset: Optional[int] = None
+
+
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+
+class ImportResult(BaseModel):
+    inserted: int
+    failed: int
+    errors: list[ImportRowError]
+
+
+class StockChange(BaseModel):
+    quantity: int = Field(gt=0)
+
+
+class StockItem(BaseModel):
+    product_id: int
+    quantity: int = Field(gt=0)
+
+
+class StockBatch(BaseModel):
+    items: list[StockItem] = Field(min_length=1)
+
+
+class StockReservation(BaseModel):
+    id: int
+    price: float
+    stock: int
+
+
+class StockEvent(BaseModel):
+    event_id: UUID
+    type: Literal["stock.reserve", "stock.release"]
+    items: list[StockItem] = Field(min_length=1)
+
+
+class StockEventBatch(BaseModel):
+    events: list[StockEvent] = Field(min_length=1, max_length=500)
+
+
+class StockEventResult(BaseModel):
+    event_id: UUID
+    status: Literal["applied", "rejected"]
+    detail: Optional[str] = None
+    items: list[StockReservation] = []
@@ -0,0 +1,111 @@
+import re
+from collections import defaultdict
+
+
+SIMILARITY_THRESHOLD = 0.3  # pg_trgm's default for the % operator
+WORD_RE = re.compile(r"\w+")
+
+
+def trigrams(text: str) -> set:
+    """Trigrams the way pg_trgm builds them: per word, lower-cased, padded '  word '."""
+    grams = set()
+    for word in WORD_RE.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(left: set, right: set) -> float:
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class TrigramIndex:
+    """In-memory inverted trigram index over product names.
+
+    Used where the database has no pg_trgm (SQLite test setups). It is
+    built lazily on the first search and then kept current by the write
+    paths through ``add``/``remove``; ``reset`` forces a rebuild.
+    """
+
+    def __init__(self):
+        self.built = False
+        self._postings = defaultdict(set)
+        self._names = {}
+        self._grams = {}
+
+    def build(self, rows):
+        self.reset()
+        for product_id, name in rows:
+            self._add(product_id, name)
+        self.built = True
+
+    def reset(self):
+        self.built = False
+        self._postings.clear()
+        self._names.clear()
+        self._grams.clear()
+
+    def add(self, product_id: int, name: str):
+        # Until the first search builds the index there is nothing to maintain.
+        if self.built:
+            self._add(product_id, name)
+
+    def remove(self, product_id: int):
+        if self.built:
+            self._remove(product_id)
+
+    def _add(self, product_id: int, name: str):
+        self._remove(product_id)
+        grams = trigrams(name or "")
+        self._names[product_id] = (name or "").lower()
+        self._grams[product_id] = grams
+        for gram in grams:
+            self._postings[gram].add(product_id)
+
+    def _remove(self, product_id: int):
+        for gram in self._grams.pop(product_id, ()):
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(product_id)
+                if not postings:
+                    del self._postings[gram]
+        self._names.pop(product_id, None)
+
+    def search(self, query: str) -> list:
+        """Return ``(product_id, rank, score)`` tuples, best first.
+
+        Rank 0 is a name prefix match, 1 a word prefix match and 2 a fuzzy
+        match above ``SIMILARITY_THRESHOLD``; ties are broken by similarity.
+        """
+        query_lower = query.lower()
+        query_grams = trigrams(query)
+
+        candidates = set()
+        for gram in query_grams:
+            candidates |= self._postings.get(gram, set())
+
+        matches = []
+        for product_id in candidates:
+            name = self._names[product_id]
+            score = similarity(query_grams, self._grams[product_id])
+            if name.startswith(query_lower):
+                rank = 0
+            elif f" {query_lower}" in name:
+                rank = 1
+            elif score >= SIMILARITY_THRESHOLD:
+                rank = 2
+            else:
+                continue
+            matches.append((product_id, rank, score))
+
+        matches.sort(key=lambda match: (match[1], -match[2], match[0]))
+        return matches
+
+
+search_index = TrigramIndex()
@@ -0,0 +1,70 @@
+import csv
+import io
+import json
+
+
+def import_products(client, as_user, user_id, body, content_type="application/x-ndjson"):
+    headers = {**as_user(user_id), "Content-Type": content_type}
+    response = client.post("/products/import", content=body, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def owned_names(client, as_user, user_id):
+    response = client.get("/products", params={"user_id": user_id}, headers=as_user(user_id))
+    return [item["name"] for item in response.json()["items"]]
+
+
+def test_ndjson_import_reports_bad_rows_and_keeps_the_rest(client, as_user, new_user):
+    body = b"\n".join([
+        json.dumps({"name": "Kettle", "price": 20, "stock": 3}).encode(),
+        b"{not json",
+        json.dumps({"name": "Toaster", "price": "cheap", "stock": 1}).encode(),
+        b"",
+        '{"name": "Café press", "price": 15, "stock": 2}'.encode("latin-1"),
+        b"[1, 2]",
+        json.dumps({"name": "Mug", "price": 4, "stock": 10}).encode(),
+    ])
+
+    result = import_products(client, as_user, new_user, body)
+
+    assert result["inserted"] == 2
+    assert result["failed"] == 4
+    errors = {error["line"]: error["error"] for error in result["errors"]}
+    assert sorted(errors) == [2, 3, 5, 6]
+    assert "price" in errors[3]
+    assert errors[5] == "invalid UTF-8 at byte 13"
+    assert errors[6] == "expected a JSON object"
+    assert owned_names(client, as_user, new_user) == ["Kettle", "Mug"]
+
+
+def test_csv_import_streams_multibyte_names_across_chunks(client, as_user, new_user):
+    data = "name,price,stock\r\nCrème brûlée torch,30,4\r\nShort row,1\r\n".encode()
+    split = data.index("è".encode()) + 1
+
+    def chunks():
+        # Break the body inside the two-byte "è".
+        yield data[:split]
+        yield data[split:]
+
+    result = import_products(client, as_user, new_user, chunks(), content_type="text/csv")
+
+    assert result["inserted"] == 1
+    assert result["errors"] == [{"line": 3, "error": "expected 3 columns, got 2"}]
+    assert owned_names(client, as_user, new_user) == ["Crème brûlée torch"]
+
+
+def test_export_streams_every_product(client, as_user, new_user):
+    import_products(client, as_user, new_user, json.dumps({"name": "Exported", "price": 1.5, "stock": 2}).encode())
+
+    ndjson = client.get("/products/export", headers=as_user(new_user))
+    assert ndjson.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert {"name": "Exported", "price": 1.5, "stock": 2} in [
+        {key: row[key] for key in ("name", "price", "stock")} for row in rows
+    ]
+
+    exported = client.get("/products/export", params={"format": "csv"}, headers=as_user(new_user))
+    table = list(csv.DictReader(io.StringIO(exported.text)))
+    assert len(table) == len(rows)
+    assert list(table[0]) == ["id", "name", "price", "stock", "version"]
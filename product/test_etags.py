@@ -0,0 +1,34 @@
+def test_product_revalidates_until_it_changes(client, product, as_user):
+    headers = {**as_user(1), "X-Read-Primary": "1"}
+    etag = client.get(f"/products/{product['id']}", headers=headers).headers["etag"]
+
+    response = client.get(f"/products/{product['id']}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+    # If-None-Match uses weak comparison.
+    weak = {**headers, "If-None-Match": f"W/{etag}"}
+    assert client.get(f"/products/{product['id']}", headers=weak).status_code == 304
+
+    client.patch(f"/products/{product['id']}", json={"stock": 1}, headers=as_user(1))
+    response = client.get(f"/products/{product['id']}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_list_page_revalidates_until_a_row_changes(client, as_user, new_user):
+    headers = as_user(new_user)
+    params = {"user_id": new_user}
+    first = client.post("/products", json={"name": "Vase", "price": 8, "stock": 1}, headers=headers).json()
+    etag = client.get("/products", params=params, headers=headers).headers["etag"]
+
+    assert client.get("/products", params=params, headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    # A new row entering the window and an update to a row both change the page.
+    client.post("/products", json={"name": "Bowl", "price": 6, "stock": 1}, headers=headers)
+    response = client.get("/products", params=params, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    client.patch(f"/products/{first['id']}", json={"price": 9}, headers=headers)
+    assert client.get("/products", params=params, headers={**headers, "If-None-Match": etag}).status_code == 200
@@ -0,0 +1,47 @@
+import pytest
+
+
+@pytest.fixture
+def catalog(client, as_user, new_user):
+    """Three products owned by ``new_user``, in id order."""
+    products = [
+        {"name": "Anvil", "price": 40, "stock": 2},
+        {"name": "Bucket", "price": 5, "stock": 0},
+        {"name": "Chisel", "price": 12, "stock": 7},
+    ]
+    return [client.post("/products", json=product, headers=as_user(new_user)).json() for product in products]
+
+
+def list_products(client, as_user, user_id, **params):
+    response = client.get("/products", params={"user_id": user_id, **params}, headers=as_user(user_id))
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_pages_follow_the_cursor(client, as_user, new_user, catalog):
+    first = list_products(client, as_user, new_user, limit=2)
+    assert [item["id"] for item in first["items"]] == [catalog[0]["id"], catalog[1]["id"]]
+    assert first["next_cursor"] == catalog[1]["id"]
+
+    second = list_products(client, as_user, new_user, limit=2, cursor=first["next_cursor"])
+    assert [item["id"] for item in second["items"]] == [catalog[2]["id"]]
+    assert second["next_cursor"] is None
+
+
+def names(page):
+    return [item["name"] for item in page["items"]]
+
+
+def test_filters_narrow_the_page(client, as_user, new_user, catalog):
+    assert names(list_products(client, as_user, new_user, min_price=10)) == ["Anvil", "Chisel"]
+    assert names(list_products(client, as_user, new_user, max_price=10)) == ["Bucket"]
+    assert names(list_products(client, as_user, new_user, in_stock="true")) == ["Anvil", "Chisel"]
+    assert names(list_products(client, as_user, new_user, in_stock="false")) == ["Bucket"]
+
+
+def test_fields_project_the_items(client, as_user, new_user, catalog):
+    page = list_products(client, as_user, new_user, fields="name,price")
+    assert page["items"][0] == {"id": catalog[0]["id"], "name": "Anvil", "price": 40}
+
+    response = client.get("/products", params={"fields": "name,secret"}, headers=as_user(new_user))
+    assert response.status_code == 400
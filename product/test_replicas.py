@@ -0,0 +1,51 @@
+import sqlite3
+
+import pytest
+
+from database import replicas
+
+
+@pytest.fixture
+def healthy_replica(client, sync_replica):
+    sync_replica()
+    client.portal.call(replicas.check)
+    assert replicas.replicas[0].healthy
+    yield replicas.replicas[0]
+    sync_replica()
+    client.portal.call(replicas.check)
+
+
+def test_other_users_read_from_the_replica(client, as_user, healthy_replica):
+    created = client.post("/products", json={"name": "Fresh", "price": 1, "stock": 1}, headers=as_user(1)).json()
+
+    # The replica has not caught up yet, so a user who didn't write misses the row...
+    assert client.get(f"/products/{created['id']}", headers=as_user(2)).status_code == 404
+    # ...while the writer and anyone asking for the primary see it.
+    assert client.get(f"/products/{created['id']}", headers=as_user(1)).status_code == 200
+    assert client.get(f"/products/{created['id']}", headers={**as_user(2), "X-Read-Primary": "1"}).status_code == 200
+
+
+def test_replica_reads_do_not_fill_the_cache(client, as_user, healthy_replica, sync_replica):
+    created = client.post("/products", json={"name": "Old", "price": 1, "stock": 1}, headers=as_user(1)).json()
+    sync_replica()
+    client.patch(f"/products/{created['id']}", json={"name": "New"}, headers=as_user(1))
+
+    # A lagging replica still serves the old row; that must not be cached...
+    assert client.get(f"/products/{created['id']}", headers=as_user(2)).json()["name"] == "Old"
+    sync_replica()
+    # ...or it would outlive the replica catching up.
+    assert client.get(f"/products/{created['id']}", headers=as_user(3)).json()["name"] == "New"
+
+
+def test_failed_replica_read_is_retried_on_the_primary(client, as_user, healthy_replica, sync_replica):
+    created = client.post("/products", json={"name": "Kept", "price": 1, "stock": 1}, headers=as_user(1)).json()
+    sync_replica()
+    failures = healthy_replica.failures
+    with sqlite3.connect(healthy_replica.engine.url.database) as replica:
+        replica.execute("DROP TABLE products")
+
+    response = client.get(f"/products/{created['id']}", headers=as_user(2))
+
+    assert response.status_code == 200
+    assert not healthy_replica.healthy
+    assert healthy_replica.failures == failures + 1
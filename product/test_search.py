@@ -0,0 +1,63 @@
+import uuid
+
+import pytest
+
+from search import TrigramIndex
+
+
+@pytest.fixture
+def word():
+    """A word no other product name contains, so the results are only this test's products."""
+    return "q" + uuid.uuid4().hex[:9]
+
+
+def search(client, as_user, q, **params):
+    response = client.get("/products/search", params={"q": q, **params}, headers=as_user(1))
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_index_ranks_prefix_then_word_then_fuzzy():
+    index = TrigramIndex()
+    index.build([(1, "Camping lantern"), (2, "Lantern kit"), (3, "Lanturn"), (4, "Garden hose"), (5, "Lanterns")])
+
+    assert [product_id for product_id, _, _ in index.search("lantern")] == [5, 2, 1, 3]
+    assert [rank for _, rank, _ in index.search("lantern")] == [0, 0, 1, 2]
+
+    index.remove(5)
+    index.add(4, "Lantern hose")
+    assert [product_id for product_id, _, _ in index.search("lantern")] == [2, 4, 1, 3]
+
+
+def test_search_endpoint_ranks_matches(client, as_user, word):
+    fuzzy = word[:-1] + ("x" if word[-1] != "x" else "y")
+    created = {
+        name: client.post("/products", json={"name": name, "price": 1, "stock": 1}, headers=as_user(1)).json()
+        for name in (f"Camping {word}", fuzzy, f"{word} kit", "Plain bucket")
+    }
+
+    page = search(client, as_user, word)
+
+    assert [item["name"] for item in page["items"]] == [f"{word} kit", f"Camping {word}", fuzzy]
+    assert page["items"][0]["id"] == created[f"{word} kit"]["id"]
+    assert page["items"][0]["score"] > 0
+    assert page["next_offset"] is None
+
+    first = search(client, as_user, word, limit=2)
+    assert first["next_offset"] == 2
+    assert [item["name"] for item in search(client, as_user, word, offset=2)["items"]] == [fuzzy]
+
+
+def test_search_follows_renames_and_deletes(client, as_user, word):
+    product = {"name": f"{word} lamp", "price": 1, "stock": 1}
+    product = client.post("/products", json=product, headers=as_user(1)).json()
+    assert [item["id"] for item in search(client, as_user, word)["items"]] == [product["id"]]
+
+    client.patch(f"/products/{product['id']}", json={"name": "Desk lamp"}, headers=as_user(1))
+    assert search(client, as_user, word)["items"] == []
+
+    client.patch(f"/products/{product['id']}", json={"name": f"Desk {word}"}, headers=as_user(1))
+    assert [item["name"] for item in search(client, as_user, word)["items"]] == [f"Desk {word}"]
+
+    client.delete(f"/products/{product['id']}", headers=as_user(1))
+    assert search(client, as_user, word)["items"] == []
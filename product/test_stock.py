@@ -0,0 +1,85 @@
+import uuid
+
+import pytest
+
+
+@pytest.fixture
+def stock_of(client, as_user):
+    def stock_of(product_id):
+        headers = {**as_user(1), "X-Read-Primary": "1"}
+        return client.get(f"/products/{product_id}", headers=headers).json()["stock"]
+    return stock_of
+
+
+def test_reserve_and_release_move_stock(client, product, internal):
+    response = client.post(f"/products/{product['id']}/reserve", json={"quantity": 4}, headers=internal)
+    assert response.status_code == 200
+    assert response.json() == {"id": product["id"], "price": 2.5, "stock": 6}
+
+    response = client.post(f"/products/{product['id']}/release", json={"quantity": 1}, headers=internal)
+    assert response.json()["stock"] == 7
+
+
+def test_reserve_never_drives_stock_negative(client, product, internal, stock_of):
+    response = client.post(f"/products/{product['id']}/reserve", json={"quantity": 11}, headers=internal)
+    assert response.status_code == 409
+    assert stock_of(product["id"]) == 10
+
+
+def test_bulk_reserve_is_all_or_nothing(client, product, internal, as_user, stock_of):
+    other = client.post("/products", json={"name": "Gadget", "price": 1, "stock": 1}, headers=as_user(1)).json()
+    items = [{"product_id": product["id"], "quantity": 2}, {"product_id": other["id"], "quantity": 5}]
+
+    response = client.post("/products/reserve", json={"items": items}, headers=internal)
+    assert response.status_code == 409
+    assert stock_of(product["id"]) == 10
+    assert stock_of(other["id"]) == 1
+
+
+def test_stock_endpoints_are_internal_only(client, product, as_user, stock_of):
+    item = {"product_id": product["id"], "quantity": 1}
+    event = {"event_id": str(uuid.uuid4()), "type": "stock.release", "items": [item]}
+    requests = [
+        (f"/products/{product['id']}/reserve", {"quantity": 1}),
+        (f"/products/{product['id']}/release", {"quantity": 1}),
+        # Spellings FastAPI also parses as the product id.
+        (f"/products/+{product['id']}/release", {"quantity": 1}),
+        (f"/products/{product['id']}.0/release", {"quantity": 1}),
+        (f"/products/%20{product['id']}/release", {"quantity": 1}),
+        ("/products/reserve", {"items": [item]}),
+        ("/products/release", {"items": [item]}),
+        ("/products/stock-events", {"events": [event]}),
+    ]
+    for path, body in requests:
+        # A forged identity header without the shared secret is not enough...
+        assert client.post(path, json=body, headers={"X-User-Id": "1"}).status_code == 403
+        # ...and neither is the gateway's own secret, which every proxied request carries.
+        assert client.post(path, json=body, headers=as_user(1)).status_code == 403
+    assert stock_of(product["id"]) == 10
+
+
+def test_stock_event_is_applied_once(client, product, internal, stock_of):
+    event = {"event_id": str(uuid.uuid4()), "type": "stock.reserve",
+             "items": [{"product_id": product["id"], "quantity": 3}]}
+
+    first = client.post("/products/stock-events", json={"events": [event]}, headers=internal).json()
+    redelivered = client.post("/products/stock-events", json={"events": [event]}, headers=internal).json()
+
+    assert first[0]["status"] == "applied"
+    assert first[0]["items"][0]["stock"] == 7
+    assert redelivered == first
+    assert stock_of(product["id"]) == 7
+
+
+def test_rejected_stock_event_keeps_its_answer(client, product, internal, stock_of):
+    event = {"event_id": str(uuid.uuid4()), "type": "stock.reserve",
+             "items": [{"product_id": product["id"], "quantity": 50}]}
+
+    first = client.post("/products/stock-events", json={"events": [event]}, headers=internal).json()
+    assert first[0]["status"] == "rejected"
+
+    # Stock freed up since then must not turn a redelivery into a reservation.
+    client.post(f"/products/{product['id']}/release", json={"quantity": 100}, headers=internal)
+    redelivered = client.post("/products/stock-events", json={"events": [event]}, headers=internal).json()
+    assert redelivered == first
+    assert stock_of(product["id"]) == 110
@@ -0,0 +1,44 @@
+def read(client, as_user, product_id):
+    return client.get(f"/products/{product_id}", headers={**as_user(1), "X-Read-Primary": "1"})
+
+
+def test_patch_changes_only_the_given_fields(client, product, as_user):
+    response = client.patch(f"/products/{product['id']}", json={"price": 3}, headers=as_user(1))
+
+    assert response.status_code == 200
+    assert response.json() == {**product, "price": 3, "version": product["version"] + 1}
+    assert response.headers["etag"] == f'"{product["version"] + 1}"'
+    assert client.patch(f"/products/{product['id']}", json={}, headers=as_user(1)).status_code == 400
+
+
+def test_stale_if_match_is_refused(client, product, as_user):
+    stale = f'"{product["version"]}"'
+    current = client.patch(f"/products/{product['id']}", json={"stock": 9}, headers=as_user(1)).headers["etag"]
+
+    response = client.patch(f"/products/{product['id']}", json={"name": "Lost update"},
+                            headers={**as_user(1), "If-Match": stale})
+    assert response.status_code == 412
+    assert read(client, as_user, product["id"]).json()["name"] == "Widget"
+
+    response = client.patch(f"/products/{product['id']}", json={"name": "Renamed"},
+                            headers={**as_user(1), "If-Match": current})
+    assert response.status_code == 200
+    assert response.json()["name"] == "Renamed"
+
+
+def test_if_match_on_put_and_delete(client, product, as_user):
+    body = {"name": "Replaced", "price": 1, "stock": 1}
+    # Weak tags never satisfy If-Match.
+    weak = {**as_user(1), "If-Match": f'W/"{product["version"]}"'}
+    assert client.put(f"/products/{product['id']}", json=body, headers=weak).status_code == 412
+    any_version = {**as_user(1), "If-Match": "*"}
+    assert client.put(f"/products/{product['id']}", json=body, headers=any_version).status_code == 200
+
+    stale = {**as_user(1), "If-Match": f'"{product["version"]}"'}
+    assert client.delete(f"/products/{product['id']}", headers=stale).status_code == 412
+    assert read(client, as_user, product["id"]).status_code == 200
+
+    current = {**as_user(1), "If-Match": f'"{product["version"] + 1}"'}
+    assert client.delete(f"/products/{product['id']}", headers=current).status_code == 200
+    # A missing product is a 404, not a version conflict.
+    assert client.delete(f"/products/{product['id']}", headers=current).status_code == 404
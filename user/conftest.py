@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+
+# The service reads its configuration at import time, so the environment is
+# set up before user_service is imported by the tests.
+WORKDIR = tempfile.mkdtemp(prefix="user-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite+aiosqlite:///{os.path.join(WORKDIR, 'user.db')}",
+    "BCRYPT_ROUNDS": "4",
+})
+
+subprocess.run(
+    [sys.executable, "-m", "alembic", "upgrade", "head"],
+    cwd=os.path.dirname(os.path.abspath(__file__)), check=True, capture_output=True,
+)
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from user_service import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def refresh_token(client):
+    """Refresh token of a fresh login for a newly registered user."""
+    credentials = {"email": f"user{os.urandom(4).hex()}@example.com", "password": "secret-password"}
+    assert client.post("/register", json=credentials).status_code == 200
+    response = client.post("/login", json=credentials)
+    assert response.status_code == 200
+    return response.json()["refresh_token"]
@@ -1,16 +1,24 @@
+import asyncio
 import os
 
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from sqlalchemy import text
+from service_common.engines import instrument_engine, trace_engine
+from service_common.metrics import event_loop_monitor
 
 
 
 DATABASE_URL = os.getenv('DATABASE_URL')
+POOL_WARM_CONNECTIONS = int(os.getenv('POOL_WARM_CONNECTIONS', '5'))
+READINESS_TIMEOUT = float(os.getenv('READINESS_TIMEOUT', '1'))
 
 Base = declarative_base()
 engine = create_async_engine(DATABASE_URL)
+instrument_engine(engine)
+trace_engine(engine)
 
 AsyncSessionLocal = sessionmaker(
     bind=engine,
@@ -28,9 +36,32 @@ async def get_db():
             await session.close()
 
 
+async def warm_pool(connections: int = POOL_WARM_CONNECTIONS):
+    """Open ``connections`` pooled connections up front so first requests skip the connect."""
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(ping() for _ in range(connections)))
+
+
+async def database_ready(timeout: float = READINESS_TIMEOUT) -> bool:
+    try:
+        async with asyncio.timeout(timeout):
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        return True
+    except Exception:
+        return False
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    yield  
-    await engine.dispose()
\ No newline at end of file
+    # The schema is managed by `alembic upgrade head`, run once before the replicas start.
+    app.state.ready = False
+    await warm_pool()
+    app.state.ready = True
+    async with event_loop_monitor():
+        yield
+    app.state.ready = False
+    await engine.dispose()
@@ -0,0 +1,107 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+HASH_WORKERS = int(os.getenv('HASH_WORKERS', str(os.cpu_count() or 1)))
+HASH_QUEUE_LIMIT = int(os.getenv('HASH_QUEUE_LIMIT', str(HASH_WORKERS * 8)))
+
+
+class HasherSaturated(Exception):
+    pass
+
+
+class OperationStats:
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.total_wait_seconds = 0.0
+
+    def record(self, wait: float, duration: float):
+        self.count += 1
+        self.total_seconds += duration
+        self.max_seconds = max(self.max_seconds, duration)
+        self.total_wait_seconds += wait
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_seconds / self.count * 1000, 3) if self.count else 0.0,
+            "max_ms": round(self.max_seconds * 1000, 3),
+            "avg_wait_ms": round(self.total_wait_seconds / self.count * 1000, 3) if self.count else 0.0,
+        }
+
+
+class PasswordHasher:
+    """Runs bcrypt on a bounded thread pool so it never blocks the event loop.
+
+    bcrypt releases the GIL while hashing, so threads give real parallelism.
+    At most ``queue_limit`` calls may be running or waiting; beyond that
+    ``HasherSaturated`` is raised immediately instead of queueing.
+    """
+
+    def __init__(self, workers: int = HASH_WORKERS, queue_limit: int = HASH_QUEUE_LIMIT, rounds: int = BCRYPT_ROUNDS):
+        self.rounds = rounds
+        self.queue_limit = queue_limit
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._pending = 0
+        self._stats = {"hash": OperationStats(), "verify": OperationStats()}
+        self._lock = threading.Lock()
+
+    async def _run(self, operation: str, fn, *args):
+        if self._pending >= self.queue_limit:
+            self.rejected += 1
+            raise HasherSaturated("Password hashing capacity exhausted")
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._timed, operation, time.perf_counter(), fn, *args)
+        finally:
+            self._pending -= 1
+
+    def _timed(self, operation: str, queued_at: float, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self._stats[operation].record(started - queued_at, finished - started)
+
+    async def hash(self, password: str) -> str:
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        hashed = await self._run("hash", bcrypt.hashpw, password.encode('utf-8'), salt)
+        return hashed.decode('utf-8')
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run("verify", bcrypt.checkpw, password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        # bcrypt hashes look like $2b$<cost>$<salt+digest>
+        try:
+            return int(hashed_password.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            operations = {name: stats.as_dict() for name, stats in self._stats.items()}
+        return {
+            "rounds": self.rounds,
+            "workers": self._executor._max_workers,
+            "queue_limit": self.queue_limit,
+            "pending": self._pending,
+            "rejected": self.rejected,
+            **operations,
+        }
+
+
+password_hasher = PasswordHasher()
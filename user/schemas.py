@@ -2,4 +2,8 @@ from pydantic import BaseModel
 
 class AuthRequest(BaseModel):
     email: str
-    password: str
\ No newline at end of file
+    password: str
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
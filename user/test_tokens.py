@@ -0,0 +1,34 @@
+def refresh(client, token):
+    return client.post("/refresh", json={"refresh_token": token})
+
+
+def test_refresh_rotates_the_token(client, refresh_token):
+    response = refresh(client, refresh_token)
+    assert response.status_code == 200
+    rotated = response.json()["refresh_token"]
+    assert rotated != refresh_token
+
+    assert refresh(client, rotated).status_code == 200
+
+
+def test_replayed_token_revokes_its_family(client, refresh_token):
+    rotated = refresh(client, refresh_token).json()["refresh_token"]
+
+    # The first token was already used: someone else holds a copy of it.
+    assert refresh(client, refresh_token).status_code == 401
+    assert refresh(client, rotated).status_code == 401
+
+
+def test_unknown_token_is_refused(client):
+    assert refresh(client, "not-a-token").status_code == 401
+
+
+def test_logout_revokes_the_whole_family(client, refresh_token):
+    rotated = refresh(client, refresh_token).json()["refresh_token"]
+
+    assert client.post("/logout", json={"refresh_token": refresh_token}).status_code == 200
+    assert refresh(client, rotated).status_code == 401
+
+
+def test_logout_with_unknown_token_fails(client):
+    assert client.post("/logout", json={"refresh_token": "not-a-token"}).status_code == 401
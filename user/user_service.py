@@ -1,20 +1,24 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Request
+from datetime import datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
-import bcrypt
 from sqlalchemy.future import select
+from sqlalchemy import update
 from database import *
 from models import *
 from schemas import *
+from hashing import password_hasher, HasherSaturated
+from tokens import hash_refresh_token, issue_refresh_token, revoke_family
+from service_common.asgi import MetricsMiddleware, TracingMiddleware, metrics_response
+from service_common.tracing import set_default_service_name
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+set_default_service_name("user")
 
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+def hashing_unavailable():
+    return HTTPException(status_code=503, detail="Service busy, try again shortly", headers={"Retry-After": "1"})
 
 
 @app.post("/login")
@@ -24,26 +28,125 @@ async def login(auth_data: AuthRequest, db: AsyncSession = Depends(get_db)):
         result = await db.execute(select(User).filter(User.email == auth_data.email))
         user = result.scalars().first()
 
-    if not user or not verify_password(auth_data.password, user.password):
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    try:
+        valid = await password_hasher.verify(auth_data.password, user.password)
+    except HasherSaturated:
+        raise hashing_unavailable()
+
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    if password_hasher.needs_rehash(user.password):
+        # The configured cost changed since this hash was made; upgrade it transparently.
+        try:
+            user.password = await password_hasher.hash(auth_data.password)
+        except HasherSaturated:
+            # The password already checked out; the upgrade waits for a later login.
+            pass
+
+    refresh_token = issue_refresh_token(db, user.id)
+    await db.commit()
+
     # Return user data to be used in the Gateway to create the token
-    return {"email": user.email, "id": user.id}
+    return {"email": user.email, "id": user.id, "refresh_token": refresh_token}
 
 
 @app.post("/register")
 async def register(auth_data: AuthRequest, db: AsyncSession = Depends(get_db)):
-    hashed_password = hash_password(auth_data.password)
-    
     result = await db.execute(select(User).filter(User.email == auth_data.email))
-    existing_user = result.scalars().first() 
-    
+    existing_user = result.scalars().first()
+
     if existing_user:
         raise HTTPException(status_code=400, detail="Username already registered")
-    
+
+    try:
+        hashed_password = await password_hasher.hash(auth_data.password)
+    except HasherSaturated:
+        raise hashing_unavailable()
+
     db_user = User(email=auth_data.email, password=hashed_password)
     db.add(db_user)
     await db.commit()
     return {"message": "User registered successfully"}
 
 
+@app.post("/refresh")
+async def refresh(data: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    token_hash = hash_refresh_token(data.refresh_token)
+    now = datetime.now(timezone.utc)
+
+    async with db.begin():
+        # Look up and consume the token in one statement, so a token can only be rotated once.
+        result = await db.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.token_hash == token_hash,
+                RefreshToken.revoked_at.is_(None),
+                RefreshToken.expires_at > now,
+            )
+            .values(revoked_at=now)
+            .returning(RefreshToken.user_id, RefreshToken.family_id)
+        )
+        row = result.first()
+
+        if row is None:
+            # A revoked token being replayed means it leaked: revoke its whole family.
+            result = await db.execute(
+                select(RefreshToken.family_id).filter(
+                    RefreshToken.token_hash == token_hash,
+                    RefreshToken.revoked_at.is_not(None),
+                )
+            )
+            family_id = result.scalar()
+            if family_id:
+                await revoke_family(db, family_id)
+        else:
+            result = await db.execute(select(User.email).filter(User.id == row.user_id))
+            email = result.scalar()
+            refresh_token = issue_refresh_token(db, row.user_id, row.family_id)
+
+    if row is None or email is None:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+    return {"email": email, "id": row.user_id, "refresh_token": refresh_token}
+
+
+@app.post("/logout")
+async def logout(data: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    async with db.begin():
+        result = await db.execute(
+            select(RefreshToken.family_id).filter(RefreshToken.token_hash == hash_refresh_token(data.refresh_token))
+        )
+        family_id = result.scalar()
+        if family_id:
+            await revoke_family(db, family_id)
+
+    if not family_id:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+    return {"message": "Logged out successfully"}
+
+
+@app.get("/hashing/stats")
+async def hashing_stats():
+    return password_hasher.stats()
+
+
+@app.get("/metrics")
+async def metrics():
+    return metrics_response()
+
+
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz(request: Request):
+    if not getattr(request.app.state, "ready", False) or not await database_ready():
+        raise HTTPException(status_code=503, detail="Not ready")
+    return {"status": "ready"}